@@ -0,0 +1,34 @@
+"""add post embeddings
+
+Revision ID: 4b7d2e9c1a3f
+Revises: 1caa519a90f8
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d2e9c1a3f'
+down_revision: Union[str, None] = '1caa519a90f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('post_embeddings',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('model_name', sa.String(), nullable=False),
+    sa.Column('dim', sa.Integer(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('post_embeddings')
@@ -0,0 +1,28 @@
+"""add feed watermarks
+
+Revision ID: 5e0a7c3d9b28
+Revises: d81f3a6b2c97
+Create Date: 2026-10-17 15:21:44.107392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0a7c3d9b28'
+down_revision: Union[str, None] = 'd81f3a6b2c97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('feed_states', sa.Column('last_entry_id', sa.String(), nullable=True))
+    op.add_column('feed_states', sa.Column('last_entry_published_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('feed_states', 'last_entry_published_at')
+    op.drop_column('feed_states', 'last_entry_id')
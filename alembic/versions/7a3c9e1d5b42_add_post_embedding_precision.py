@@ -0,0 +1,27 @@
+"""add post embedding precision
+
+Revision ID: 7a3c9e1d5b42
+Revises: 0b8c4e2f6a13
+Create Date: 2026-10-17 19:02:11.518340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3c9e1d5b42'
+down_revision: Union[str, None] = '0b8c4e2f6a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing vectors were all written as float32
+    op.add_column('post_embeddings', sa.Column('precision', sa.String(), server_default='float32', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('post_embeddings', 'precision')
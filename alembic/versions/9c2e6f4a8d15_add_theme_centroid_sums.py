@@ -0,0 +1,29 @@
+"""add theme centroid sums
+
+Revision ID: 9c2e6f4a8d15
+Revises: 4b7d2e9c1a3f
+Create Date: 2026-10-17 11:40:06.518932
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2e6f4a8d15'
+down_revision: Union[str, None] = '4b7d2e9c1a3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Sums are computed from post_embeddings on first startup (or `python -m app.cli rebuild-centroids`)
+    op.add_column('themes', sa.Column('embedding_sum', sa.LargeBinary(), nullable=True))
+    op.add_column('themes', sa.Column('embedding_count', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('themes', 'embedding_count')
+    op.drop_column('themes', 'embedding_sum')
@@ -0,0 +1,44 @@
+"""add post fingerprints
+
+Revision ID: a4f19c6e0d72
+Revises: 5e0a7c3d9b28
+Create Date: 2026-10-17 16:02:18.551204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f19c6e0d72'
+down_revision: Union[str, None] = '5e0a7c3d9b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('post_fingerprints',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('signature', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+    op.create_table('post_fingerprint_bands',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_post_fingerprint_bands_post_id'), 'post_fingerprint_bands', ['post_id'], unique=False)
+    op.create_index(op.f('ix_post_fingerprint_bands_bucket'), 'post_fingerprint_bands', ['bucket'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_post_fingerprint_bands_bucket'), table_name='post_fingerprint_bands')
+    op.drop_index(op.f('ix_post_fingerprint_bands_post_id'), table_name='post_fingerprint_bands')
+    op.drop_table('post_fingerprint_bands')
+    op.drop_table('post_fingerprints')
@@ -0,0 +1,25 @@
+"""add posts theme published index
+
+Revision ID: b37e5d1f8a46
+Revises: a4f19c6e0d72
+Create Date: 2026-10-17 16:24:37.018265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b37e5d1f8a46'
+down_revision: Union[str, None] = 'a4f19c6e0d72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_posts_theme_id_published_at', 'posts', ['theme_id', 'published_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_theme_id_published_at', table_name='posts')
@@ -0,0 +1,54 @@
+"""compress post content
+
+Revision ID: c5a8e2d47b19
+Revises: b37e5d1f8a46
+Create Date: 2026-10-17 16:48:12.409731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.db.types import compress_text, decompress_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a8e2d47b19'
+down_revision: Union[str, None] = 'b37e5d1f8a46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _rewrite_content(value_type: str, convert) -> None:
+    """Rewrite `posts.content` values stored as `value_type` ('text' or 'blob') in batches."""
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, content FROM posts WHERE id > :last_id AND typeof(content) = :value_type "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "value_type": value_type, "limit": BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            sa.text("UPDATE posts SET content = :content WHERE id = :id"),
+            [{"id": row.id, "content": convert(row.content)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    # Existing rows are compressed with the configured codec; the column keeps its type
+    if settings.CONTENT_COMPRESSION.lower() != "none":
+        _rewrite_content("text", compress_text)
+
+
+def downgrade() -> None:
+    _rewrite_content("blob", decompress_text)
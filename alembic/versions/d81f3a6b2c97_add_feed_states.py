@@ -0,0 +1,40 @@
+"""add feed states
+
+Revision ID: d81f3a6b2c97
+Revises: 9c2e6f4a8d15
+Create Date: 2026-10-17 14:05:52.730415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f3a6b2c97'
+down_revision: Union[str, None] = '9c2e6f4a8d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('feed_states',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('feed_url', sa.String(), nullable=False),
+    sa.Column('etag', sa.String(), nullable=True),
+    sa.Column('last_modified', sa.String(), nullable=True),
+    sa.Column('last_status', sa.Integer(), nullable=True),
+    sa.Column('last_fetched_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_feed_states_id'), 'feed_states', ['id'], unique=False)
+    op.create_index(op.f('ix_feed_states_feed_url'), 'feed_states', ['feed_url'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_feed_states_feed_url'), table_name='feed_states')
+    op.drop_index(op.f('ix_feed_states_id'), table_name='feed_states')
+    op.drop_table('feed_states')
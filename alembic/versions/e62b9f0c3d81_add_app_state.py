@@ -0,0 +1,32 @@
+"""add app state
+
+Revision ID: e62b9f0c3d81
+Revises: c5a8e2d47b19
+Create Date: 2026-10-17 17:10:45.862309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e62b9f0c3d81'
+down_revision: Union[str, None] = 'c5a8e2d47b19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    app_state = op.create_table('app_state',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.bulk_insert(app_state, [{'key': 'data_version', 'value': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('app_state')
@@ -0,0 +1,34 @@
+"""add feed poll schedule
+
+Revision ID: f3d7a1c95e60
+Revises: e62b9f0c3d81
+Create Date: 2026-10-17 17:42:03.274519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3d7a1c95e60'
+down_revision: Union[str, None] = 'e62b9f0c3d81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('feed_states', sa.Column('poll_interval_seconds', sa.Float(), nullable=True))
+    op.add_column('feed_states', sa.Column('publish_interval_seconds', sa.Float(), nullable=True))
+    op.add_column('feed_states', sa.Column('consecutive_failures', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('feed_states', sa.Column('next_poll_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_feed_states_next_poll_at'), 'feed_states', ['next_poll_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_feed_states_next_poll_at'), table_name='feed_states')
+    op.drop_column('feed_states', 'next_poll_at')
+    op.drop_column('feed_states', 'consecutive_failures')
+    op.drop_column('feed_states', 'publish_interval_seconds')
+    op.drop_column('feed_states', 'poll_interval_seconds')
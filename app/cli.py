@@ -0,0 +1,131 @@
+"""
+Command line entry point for maintenance tasks.
+
+Usage:
+    python -m app.cli backfill-embeddings [--batch-size N] [--force]
+    python -m app.cli rebuild-centroids [--all]
+    python -m app.cli backfill-fingerprints [--batch-size N]
+    python -m app.cli prune-content [--days N] [--archive-dir DIR]
+    python -m app.cli recluster [--clusters N] [--batch-size N] [--dry-run]
+    python -m app.cli compact-themes [--threshold X] [--dry-run]
+    python -m app.cli rebuild-embedding-matrix
+"""
+import argparse
+import json
+import sys
+from app.core.logging import logger
+
+
+def backfill_embeddings(args: argparse.Namespace) -> int:
+    from app.services.nlp_service import NLPService
+    from app.services.embeddings import backfill_post_embeddings
+
+    total = backfill_post_embeddings(NLPService(), batch_size=args.batch_size, force=args.force)
+    print(f"Embedded {total} posts")
+    return 0
+
+
+def rebuild_centroids(args: argparse.Namespace) -> int:
+    from app.services.embeddings import rebuild_theme_centroids
+
+    total = rebuild_theme_centroids(only_missing=not args.all)
+    print(f"Rebuilt centroids for {total} themes")
+    return 0
+
+
+def backfill_fingerprints(args: argparse.Namespace) -> int:
+    from app.services.dedup import NearDuplicateFilter, backfill_post_fingerprints
+
+    total = backfill_post_fingerprints(NearDuplicateFilter(), batch_size=args.batch_size)
+    print(f"Fingerprinted {total} posts")
+    return 0
+
+
+def prune_content(args: argparse.Namespace) -> int:
+    from app.services.retention import prune_post_content
+
+    total = prune_post_content(days=args.days, archive_dir=args.archive_dir)
+    print(f"Pruned content of {total} posts")
+    return 0
+
+
+def recluster(args: argparse.Namespace) -> int:
+    from app.services.reclustering import recluster_themes
+
+    report = recluster_themes(n_clusters=args.clusters, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def compact_themes(args: argparse.Namespace) -> int:
+    from app.services.theme_compaction import compact_themes
+
+    report = compact_themes(threshold=args.threshold, dry_run=args.dry_run)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def rebuild_embedding_matrix(args: argparse.Namespace) -> int:
+    from app.core.config import settings
+    from app.services.ann_index import ExactSearcher
+    from app.services.embedding_matrix import SharedEmbeddingMatrix
+    from app.services.theme_index import SharedThemeIndex
+
+    matrix = SharedEmbeddingMatrix(settings.EMBEDDING_MATRIX_PATH)
+    matrix.remove()
+    index = SharedThemeIndex(matrix, searcher=ExactSearcher())
+    index.load()
+    print(f"Wrote {index.size} embeddings to {matrix.path}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="RSS NLP Ingestion maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subparsers.add_parser("backfill-embeddings", help="Store thesis embeddings for posts that lack one")
+    backfill.add_argument("--batch-size", type=int, default=256, help="Posts encoded per batch")
+    backfill.add_argument("--force", action="store_true", help="Re-encode posts embedded with a different model")
+    backfill.set_defaults(func=backfill_embeddings)
+
+    centroids = subparsers.add_parser("rebuild-centroids", help="Recompute theme embedding sums from stored post embeddings")
+    centroids.add_argument("--all", action="store_true", help="Rebuild every theme, not only those missing a sum")
+    centroids.set_defaults(func=rebuild_centroids)
+
+    fingerprints = subparsers.add_parser("backfill-fingerprints", help="Fingerprint stored posts for near-duplicate detection")
+    fingerprints.add_argument("--batch-size", type=int, default=1000, help="Posts fingerprinted per transaction")
+    fingerprints.set_defaults(func=backfill_fingerprints)
+
+    prune = subparsers.add_parser("prune-content", help="Drop article content older than the retention period")
+    prune.add_argument("--days", type=int, default=None, help="Retention period (defaults to CONTENT_RETENTION_DAYS)")
+    prune.add_argument("--archive-dir", default=None, help="Archive content here first (defaults to CONTENT_ARCHIVE_DIR)")
+    prune.set_defaults(func=prune_content)
+
+    reclustering = subparsers.add_parser("recluster", help="Re-cluster all stored embeddings and rewrite the themes")
+    reclustering.add_argument("--clusters", type=int, default=None, help="Clusters to fit (defaults to RECLUSTER_N_CLUSTERS or the theme count)")
+    reclustering.add_argument("--batch-size", type=int, default=None, help="Embeddings per chunk (defaults to RECLUSTER_BATCH_SIZE)")
+    reclustering.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+    reclustering.set_defaults(func=recluster)
+
+    compaction = subparsers.add_parser("compact-themes", help="Merge themes whose centroids are very similar")
+    compaction.add_argument("--threshold", type=float, default=None, help="Centroid similarity to merge at (defaults to THEME_MERGE_THRESHOLD)")
+    compaction.add_argument("--dry-run", action="store_true", help="Report the merges without writing them")
+    compaction.set_defaults(func=compact_themes)
+
+    matrix = subparsers.add_parser("rebuild-embedding-matrix", help="Rewrite the shared embedding matrix from the database (stop the workers first)")
+    matrix.set_defaults(func=rebuild_embedding_matrix)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except Exception as e:
+        logger.error(f"Command '{args.command}' failed: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
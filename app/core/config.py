@@ -14,6 +14,17 @@ class Settings(BaseSettings):
     # SQLite configuration
     SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", "rss_nlp.db")
     SQLALCHEMY_DATABASE_URI: str = f"sqlite:///{SQLITE_DB_PATH}"
+
+    # Database engine profile: "default" plain engine, or "production" WAL + tuned pragmas
+    DB_ENGINE_PROFILE: str = "production"
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Safe with WAL; commits no longer fsync the database file
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456  # Bytes of the database file memory-mapped per connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait this long for locks instead of failing with "database is locked"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: int = 30
     
     RSS_FEEDS: List[str] = [
         "http://feeds.bbci.co.uk/news/technology/rss.xml",  # BBC Technology News
@@ -22,10 +33,88 @@ class Settings(BaseSettings):
         "https://feeds.arstechnica.com/arstechnica/index"  # Ars Technica
     ]
     
-    SCHEDULE_INTERVAL_MINUTES: int = 60  # Default to checking feeds every hour
+    # API pagination
+    API_PAGE_SIZE: int = 100  # Default number of themes or posts per page
+    API_MAX_PAGE_SIZE: int = 1000
+    RESPONSE_CACHE_SIZE: int = 256  # Theme API responses cached per worker
+    RESPONSE_CACHE_MAX_BYTES: int = 33554432  # Total size of cached response bodies
+
+    # Leader election between workers (only the leader ingests)
+    LEADER_ELECTION: bool = True  # False makes every worker ingest, as with a single worker
+    LEADER_LEASE_SECONDS: int = 30  # A leader that stops renewing loses the lease after this long
+    LEADER_RENEW_SECONDS: int = 10  # How often the leader renews, and followers try to take over
+
+    # Background ingest jobs
+    INGEST_JOB_HISTORY: int = 100  # Finished jobs kept for status queries
+    INGEST_STREAM_POLL_SECONDS: float = 0.5  # How often the job event stream checks for updates
+
+    SCHEDULE_INTERVAL_MINUTES: int = 60  # Initial polling interval of a feed; adapted per feed afterwards
+
+    # Adaptive per-feed polling
+    SCHEDULER_TICK_SECONDS: int = 30  # How often the scheduler looks for feeds that are due
+    SCHEDULER_MAX_CONCURRENT_FEEDS: int = 16  # Feeds being ingested at once across all jobs
+    FEED_POLL_MIN_SECONDS: int = 300  # Fastest polling interval for busy feeds
+    FEED_POLL_MAX_SECONDS: int = 86400  # Slowest polling interval for feeds that never change
+    FEED_POLL_MAX_BACKOFF_SECONDS: int = 86400  # Upper bound of the retry delay for failing feeds
+    FEED_POLL_JITTER: float = 0.1  # Next poll time is randomized by this fraction of the interval
+
+    # Feed fetching
+    FETCH_TIMEOUT_SECONDS: float = 20.0  # Total timeout per feed request
+    FETCH_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    FETCH_MAX_CONNECTIONS: int = 50  # Size of the shared HTTP connection pool
+    FETCH_MAX_PER_HOST: int = 4  # Concurrent requests to the same host
     
     # NLP Settings
     SIMILARITY_THRESHOLD: float = 0.5  # Lowered threshold for better theme connection
     MODEL_NAME: str = "all-MiniLM-L6-v2"  # Default sentence transformer model
+    EMBEDDING_PRECISION: str = "float32"  # Stored and indexed thesis embeddings: "float32", "float16" or "int8"
+    SHARED_EMBEDDING_MATRIX: bool = False  # Memory-map the theme index vectors from one file shared by all workers
+    EMBEDDING_MATRIX_PATH: str = f"{os.path.splitext(SQLITE_DB_PATH)[0]}.embeddings"  # Shared matrix file, next to the database
+    EMBEDDING_CACHE_SIZE: int = 20000  # Embeddings kept in the in-memory LRU cache
+    EMBEDDING_CACHE_PATH: str = ""  # SQLite file for the persistent cache tier, empty disables it
+    ENCODE_BATCH_SIZE: int = 128  # Sentences per encoder forward pass during ingestion
+    MAX_SENTENCES_PER_ARTICLE: int = 40  # Sentences encoded per article when picking the thesis
+    MAX_TOKENS_PER_ARTICLE: int = 1500  # Whitespace tokens encoded per article when picking the thesis
+    INGEST_WRITE_BATCH_SIZE: int = 200  # New posts written per database transaction
+    ENCODE_CHUNK_ENTRIES: int = 256  # Cleaned entries encoded together in one encoder call
+    THEME_MERGE_THRESHOLD: float = 0.6  # Theme centroids at least this similar are merged by compaction
+    THEME_COMPACTION_MINUTES: int = 60  # How often similar themes are merged in the background, 0 disables it
+    RECLUSTER_N_CLUSTERS: int = 0  # Clusters fitted by offline re-clustering, 0 keeps the current number of themes
+    RECLUSTER_MERGE_THRESHOLD: float = 0.6  # Re-clustered centroids at least this similar become one theme
+    RECLUSTER_BATCH_SIZE: int = 10000  # Embeddings streamed per re-clustering chunk
+    RECLUSTER_EPOCHS: int = 2  # Passes over the corpus when fitting the re-clustering centroids
+
+    # Semantic search
+    SEARCH_DEFAULT_K: int = 10  # Posts and themes returned by /themes/search by default
+    SEARCH_MAX_K: int = 100
+    SEARCH_REFRESH_SECONDS: float = 5.0  # How often non-ingesting workers pick up new posts for search
+    SEARCH_INDEX_MODE: str = "ivf"  # Candidate search for /themes/search: "exact" full scan or "ivf"
+
+    # HTML cleaning stage
+    CLEAN_WORKERS: int = 0  # Processes used to clean HTML, 0 cleans inline
+    CLEAN_QUEUE_SIZE: int = 64  # Documents in flight between the cleaning and encoding stages
+    HTML_PARSER: str = "auto"  # BeautifulSoup parser; "auto" prefers lxml, then html5lib, then html.parser
+
+    # Article content storage
+    CONTENT_COMPRESSION: str = "zlib"  # "none", "zlib", or "zstd" (needs the zstandard package)
+    CONTENT_COMPRESSION_LEVEL: int = 6
+    CONTENT_RETENTION_DAYS: int = 0  # Drop content of posts published longer ago than this, 0 keeps it forever
+    CONTENT_ARCHIVE_DIR: str = ""  # Write dropped content to gzipped JSON lines here first, empty discards it
+
+    # Near-duplicate detection
+    DEDUP_ENABLED: bool = True  # Fingerprint cleaned content and check for near-duplicates before encoding
+    DEDUP_THRESHOLD: float = 0.8  # Estimated Jaccard similarity at which an article counts as a duplicate
+    DEDUP_ACTION: str = "link"  # "link" stores duplicates with the original's thesis and theme, "skip" drops them
+    DEDUP_NUM_PERM: int = 128  # MinHash permutations per signature
+    DEDUP_BANDS: int = 32  # LSH bands; must divide DEDUP_NUM_PERM
+    DEDUP_SHINGLE_SIZE: int = 5  # Words per shingle
+
+    # Theme index settings
+    THEME_MATCH_MODE: str = "max"  # "max" over a theme's posts, or "centroid" of the theme
+    THEME_INDEX_MODE: str = "exact"  # "exact" full scan or "ivf" approximate search
+    THEME_CANDIDATES_TOP_K: int = 5  # Candidate themes considered per thesis
+    IVF_N_LISTS: int = 0  # Number of IVF partitions, 0 = about sqrt(number of posts)
+    IVF_N_PROBE: int = 8  # Partitions scanned per query
+    IVF_MIN_TRAIN_SIZE: int = 10000  # Below this many posts the IVF index falls back to a full scan
 
 settings = Settings() 
\ No newline at end of file
@@ -1,17 +1,92 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+
+def _sqlite_pragmas(read_only: bool) -> list:
+    """PRAGMA statements applied to every new connection of the production profile."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}",  # Negative values are KiB
+        f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # The journal mode is persistent in the database file, so only the writer sets it
+        pragmas.append(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        pragmas.append(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+    return pragmas
+
+
+def create_db_engine(database_uri: str = None, profile: str = None, read_only: bool = False) -> Engine:
+    """
+    Create an engine for the given `DB_ENGINE_PROFILE`.
+
+    "default" is a plain SQLite engine. "production" enables WAL so readers do not
+    block behind the ingest writer, applies the tuning pragmas from `Settings` on
+    connect and sizes the connection pool. With `read_only`, connections are opened
+    in SQLite's read-only mode for API reads.
+    """
+    database_uri = database_uri or settings.SQLALCHEMY_DATABASE_URI
+    profile = (profile or settings.DB_ENGINE_PROFILE).lower()
+    if profile == "default":
+        return create_engine(
+            database_uri,
+            connect_args={"check_same_thread": False}  # Needed for SQLite
+        )
+    if profile != "production":
+        raise ValueError(f"Unknown database engine profile: {profile}")
+
+    connect_args = {
+        "check_same_thread": False,  # Needed for SQLite
+        "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+    }
+    if read_only and database_uri.startswith("sqlite:///"):
+        database_uri = f"sqlite:///file:{database_uri[len('sqlite:///'):]}?mode=ro&uri=true"
+
+    engine = create_engine(
+        database_uri,
+        connect_args=connect_args,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_pre_ping=True
+    )
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return engine
+
+
 # Create engine with SQLite-specific configuration
-engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only engine for API reads; the default profile shares the writer engine
+read_engine = create_db_engine(read_only=True) if settings.DB_ENGINE_PROFILE.lower() == "production" else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
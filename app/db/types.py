@@ -0,0 +1,60 @@
+from typing import Optional, Union
+import zlib
+from sqlalchemy.types import Text, TypeDecorator
+from app.core.config import settings
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"  # Frame header of every zstd stream
+COMPRESSION_CODECS = ("none", "zlib", "zstd")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("CONTENT_COMPRESSION=zstd needs the 'zstandard' package") from e
+    return zstandard
+
+
+def compress_text(text: str, codec: Optional[str] = None) -> Union[str, bytes]:
+    """Compress text for storage with `CONTENT_COMPRESSION`; "none" returns it unchanged."""
+    codec = (codec or settings.CONTENT_COMPRESSION).lower()
+    if codec == "none":
+        return text
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, settings.CONTENT_COMPRESSION_LEVEL)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=settings.CONTENT_COMPRESSION_LEVEL).compress(data)
+    raise ValueError(f"Unknown content compression codec: {codec}")
+
+
+def decompress_text(value: Union[str, bytes]) -> str:
+    """Inverse of `compress_text`; the codec is detected from the stored value, so mixed rows read fine."""
+    if isinstance(value, str):
+        return value
+    if value.startswith(ZSTD_MAGIC):
+        return _zstd().ZstdDecompressor().decompress(value).decode("utf-8")
+    return zlib.decompress(value).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored compressed at rest.
+
+    Compressed values are written as BLOBs (SQLite keeps them as-is in a TEXT
+    column), plain strings are left alone, so rows written before compression
+    was enabled stay readable and the column needs no schema change.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
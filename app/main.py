@@ -2,7 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import themes, admin, ingest
 from app.core.config import settings
-from app.services.scheduler import scheduler
+from app.services.scheduler import scheduler, feed_service
+from app.services.leader import LeaderElection, ingest_lease
+from apscheduler.schedulers.base import STATE_PAUSED
+import asyncio
 import multiprocessing
 import atexit
 import signal
@@ -17,16 +20,41 @@ def cleanup_resources():
         # Reset the resource tracker instead of trying to clear it
         multiprocessing.resource_tracker._resource_tracker = multiprocessing.resource_tracker.ResourceTracker()
 
+async def start_ingestion():
+    """Load the theme index and start (or resume) scheduled ingestion in this worker."""
+    await asyncio.to_thread(feed_service.theme_service.sync_index)
+    await asyncio.to_thread(feed_service.theme_service.ensure_index)
+    if scheduler.state == STATE_PAUSED:
+        scheduler.resume()
+    elif not scheduler.running:
+        scheduler.start()
+
+async def stop_ingestion():
+    """Stop scheduling ingest runs after losing leadership to another worker."""
+    if scheduler.running:
+        scheduler.pause()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    scheduler.start()
+    # Startup: with leader election only the worker holding the ingest lease
+    # loads the model and theme index and runs the scheduler; others serve reads
+    election = None
+    if settings.LEADER_ELECTION:
+        election = LeaderElection(ingest_lease, on_elected=start_ingestion, on_demoted=stop_ingestion)
+        election.start()
+    else:
+        await start_ingestion()
     atexit.register(cleanup_resources)
     signal.signal(signal.SIGTERM, lambda s, f: cleanup_resources())
     signal.signal(signal.SIGINT, lambda s, f: cleanup_resources())
     yield
     # Shutdown
-    scheduler.shutdown()
+    if election is not None:
+        await election.stop()
+    if scheduler.running:
+        scheduler.shutdown()
+    await feed_service.fetcher.aclose()
+    feed_service.cleaner.shutdown()
     cleanup_resources()
 
 app = FastAPI(
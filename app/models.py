@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Index, Integer, BigInteger, Float, String, DateTime, ForeignKey, Text, LargeBinary
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
+from app.db.types import CompressedText
 
 Base = declarative_base()
 
@@ -11,19 +12,84 @@ class Theme(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    embedding_sum = Column(LargeBinary)  # float64 running sum of member post embeddings
+    embedding_count = Column(Integer, default=0, nullable=False)
     posts = relationship("Post", back_populates="theme")
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Covers per-theme counts, latest-post lookups and timeline pages
+        Index("ix_posts_theme_id_published_at", "theme_id", "published_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     theme_id = Column(Integer, ForeignKey("themes.id"))
     thesis_text = Column(Text, nullable=False)
     post_title = Column(String, nullable=False)
     post_url = Column(String, unique=True, index=True, nullable=False)
-    content = Column(Text)
+    content = deferred(Column(CompressedText))  # Cleaned article text, only loaded when accessed
     published_at = Column(DateTime, nullable=False)
     ingested_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    theme = relationship("Theme", back_populates="posts") 
\ No newline at end of file
+    theme = relationship("Theme", back_populates="posts")
+    embedding = relationship("PostEmbedding", back_populates="post", uselist=False, cascade="all, delete-orphan")
+
+class PostEmbedding(Base):
+    __tablename__ = "post_embeddings"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    model_name = Column(String, nullable=False)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # L2-normalized thesis embedding, encoded at `precision`
+    precision = Column(String, nullable=False, default="float32", server_default="float32")
+    created_at = Column(DateTime, default=datetime.utcnow)
+    post = relationship("Post", back_populates="embedding") 
+
+class PostFingerprint(Base):
+    __tablename__ = "post_fingerprints"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)  # uint32 MinHash signature of the cleaned content
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PostFingerprintBand(Base):
+    __tablename__ = "post_fingerprint_bands"
+
+    id = Column(Integer, primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), index=True, nullable=False)
+    bucket = Column(BigInteger, index=True, nullable=False)  # Hash of one LSH band of the signature
+
+class FeedState(Base):
+    __tablename__ = "feed_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    feed_url = Column(String, unique=True, index=True, nullable=False)
+    etag = Column(String)
+    last_modified = Column(String)
+    last_status = Column(Integer)
+    last_fetched_at = Column(DateTime)
+    last_entry_id = Column(String)  # GUID (or link) of the newest entry seen
+    last_entry_published_at = Column(DateTime)  # Publish time of the newest entry seen
+    poll_interval_seconds = Column(Float)  # Adaptive polling interval, see `poll_policy`
+    publish_interval_seconds = Column(Float)  # Moving average of the gap between the feed's entries
+    consecutive_failures = Column(Integer, default=0, nullable=False)
+    next_poll_at = Column(DateTime, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AppState(Base):
+    __tablename__ = "app_state"
+
+    key = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Lease(Base):
+    __tablename__ = "leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)  # host:pid:nonce of the worker holding the lease
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
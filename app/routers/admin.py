@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional
 from app.core.config import settings
-from app.services.feed_service import FeedService
+from app.services.ingest_jobs import feed_service
+from app.services.model_registry import loaded_models
+from app.services.embedding_cache import embedding_cache
+from app.services.leader import is_ingest_leader
+from app.services.response_cache import response_cache
+from app.services.reclustering import recluster_themes
+from app.services.scheduler import compact_theme_layout
+import asyncio
 import json
 import os
 
 router = APIRouter()
-feed_service = FeedService()
 
 class RSSFeed(BaseModel):
     url: HttpUrl
@@ -17,6 +23,15 @@ class ConfigUpdate(BaseModel):
     schedule_interval_minutes: Optional[int] = None
     model_name: Optional[str] = None
 
+def _require_leader() -> None:
+    if not is_ingest_leader():
+        # Theme rewrites must hold off the leader's ingest pipeline, which only runs there
+        raise HTTPException(
+            status_code=503,
+            detail="Theme maintenance runs on the leader worker; retry the request",
+            headers={"Retry-After": "1"}
+        )
+
 @router.post("/feeds", response_model=dict)
 async def add_feed(feed: RSSFeed):
     """Add a new RSS feed to the configuration."""
@@ -113,4 +128,54 @@ async def get_config():
         "similarity_threshold": settings.SIMILARITY_THRESHOLD,
         "schedule_interval_minutes": settings.SCHEDULE_INTERVAL_MINUTES,
         "model_name": settings.MODEL_NAME
-    } 
\ No newline at end of file
+    } 
+
+@router.get("/models", response_model=List[dict])
+async def list_models():
+    """List the NLP models loaded in this worker and their memory footprint."""
+    return loaded_models()
+
+@router.get("/embedding-cache", response_model=dict)
+async def embedding_cache_stats():
+    """Report embedding cache size and hit/miss counters for this worker."""
+    return embedding_cache.stats()
+
+
+@router.get("/response-cache", response_model=dict)
+async def response_cache_stats():
+    """Report the theme response cache size and hit/miss counters for this worker."""
+    return response_cache.stats()
+
+
+@router.post("/recluster", response_model=dict)
+async def recluster(
+    clusters: Optional[int] = Query(None, ge=1, description="Clusters to fit (defaults to RECLUSTER_N_CLUSTERS or the current theme count)"),
+    dry_run: bool = Query(False, description="Report the changes without writing them")
+):
+    """Re-cluster every stored embedding into themes and report the diff and timings."""
+    _require_leader()
+
+    def run() -> dict:
+        # Hold the ingest pipeline off while the themes are rewritten
+        with feed_service.pipeline_lock:
+            report = recluster_themes(n_clusters=clusters, dry_run=dry_run)
+            feed_service.theme_service.sync_index()
+            return report
+
+    try:
+        return await asyncio.to_thread(run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/compact-themes", response_model=dict)
+async def compact_theme_layout_now(
+    threshold: Optional[float] = Query(None, ge=0, le=1, description="Centroid similarity to merge at (defaults to THEME_MERGE_THRESHOLD)"),
+    dry_run: bool = Query(False, description="Report the merges without writing them")
+):
+    """Merge themes whose centroids are very similar and report the merges."""
+    _require_leader()
+    try:
+        return await asyncio.to_thread(compact_theme_layout, threshold, dry_run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
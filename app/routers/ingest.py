@@ -1,29 +1,56 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List
-from app.services.feed_service import FeedService
-from app.schemas import ProcessFeedsResponse, Post
+from app.core.config import settings
+from app.services.ingest_jobs import job_manager
+from app.services.leader import is_ingest_leader
 
-router = APIRouter(
-    prefix="/ingest",
-    tags=["ingest"]
-)
+router = APIRouter()
 
-@router.post("/process-all", response_model=ProcessFeedsResponse)
+def _require_leader() -> None:
+    if not is_ingest_leader():
+        # Only the worker holding the ingest lease runs ingestion; a retry may reach it
+        raise HTTPException(
+            status_code=503,
+            detail="Ingestion runs on the leader worker; retry the request",
+            headers={"Retry-After": "1"}
+        )
+
+def _get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        # Jobs live in the memory of the worker that runs them, which may be another one
+        _require_leader()
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def _job_accepted(feed_urls: List[str]) -> dict:
+    _require_leader()
+    job, coalesced = job_manager.submit(feed_urls)
+    return {"job_id": job.id, "status": job.status, "coalesced": coalesced}
+
+@router.post("/process-all", response_model=dict, status_code=202)
 async def process_all_feeds():
-    """Process all configured RSS feeds."""
-    feed_service = FeedService()
-    try:
-        posts = await feed_service.process_all_feeds()
-        return ProcessFeedsResponse(posts=posts)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/process-feed/{feed_url:path}", response_model=ProcessFeedsResponse)
+    """Start processing all configured RSS feeds in the background and return the job ID."""
+    return _job_accepted(settings.RSS_FEEDS)
+
+@router.post("/process-feed/{feed_url:path}", response_model=dict, status_code=202)
 async def process_feed(feed_url: str):
-    """Process a specific RSS feed."""
-    feed_service = FeedService()
-    try:
-        posts = await feed_service.process_feed(feed_url)
-        return ProcessFeedsResponse(posts=posts)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+    """Start processing a specific RSS feed in the background and return the job ID."""
+    return _job_accepted([feed_url])
+
+@router.get("/jobs", response_model=List[dict])
+async def list_jobs():
+    """List recent ingest jobs, newest first."""
+    return [job.to_dict() for job in job_manager.list()]
+
+@router.get("/jobs/{job_id}", response_model=dict)
+async def get_job(job_id: str):
+    """Report an ingest job's status, per-feed progress, post counts and stage timings."""
+    return _get_job(job_id).to_dict()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream an ingest job's progress events as newline-delimited JSON until it finishes."""
+    job = _get_job(job_id)
+    return StreamingResponse(job_manager.stream(job), media_type="application/x-ndjson")
@@ -1,21 +1,48 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.db.session import get_db
 from app.services.theme_service import ThemeService
-from typing import List, Dict
+from app.services.response_cache import cached_json_response
+from app.services.ingest_jobs import feed_service
+from app.services.semantic_search import SemanticSearch
+from datetime import datetime
+from typing import List, Dict, Literal, Optional
+import asyncio
 
 router = APIRouter()
 theme_service = ThemeService()
+semantic_search = SemanticSearch(feed_service.theme_service)
 
 @router.get("/", response_model=List[Dict])
-async def list_themes():
-    """List all themes with their post counts."""
-    return theme_service.get_all_themes()
+async def list_themes(
+    request: Request,
+    limit: int = Query(settings.API_PAGE_SIZE, ge=1, le=settings.API_MAX_PAGE_SIZE),
+    after_id: Optional[int] = Query(None, description="Last theme ID of the previous page"),
+    sort: Literal["count", "recent"] = "count"
+):
+    """List themes with their post counts, one page at a time."""
+    return cached_json_response(request, lambda: theme_service.get_all_themes(limit=limit, after_id=after_id, sort=sort))
+
+@router.get("/search", response_model=Dict)
+async def search(
+    q: str = Query(..., min_length=1, description="Search text"),
+    k: int = Query(settings.SEARCH_DEFAULT_K, ge=1, le=settings.SEARCH_MAX_K),
+    published_after: Optional[datetime] = Query(None, description="Only posts published at or after this time"),
+    published_before: Optional[datetime] = Query(None, description="Only posts published before this time")
+):
+    """Find the posts and themes most similar to a query by cosine similarity of thesis embeddings."""
+    return await asyncio.to_thread(semantic_search.search, q, k, published_after, published_before)
 
 @router.get("/{theme_id}", response_model=Dict)
-async def get_theme_timeline(theme_id: int):
-    """Get a timeline view of all posts for a specific theme."""
-    theme_data = theme_service.get_theme_timeline(theme_id)
-    if not theme_data:
+async def get_theme_timeline(
+    request: Request,
+    theme_id: int,
+    limit: int = Query(settings.API_PAGE_SIZE, ge=1, le=settings.API_MAX_PAGE_SIZE),
+    after_id: Optional[int] = Query(None, description="Last post ID of the previous page")
+):
+    """Get a timeline view of the posts for a specific theme, one page at a time."""
+    response = cached_json_response(request, lambda: theme_service.get_theme_timeline(theme_id, limit=limit, after_id=after_id))
+    if response is None:
         raise HTTPException(status_code=404, detail="Theme not found")
-    return theme_data 
\ No newline at end of file
+    return response 
\ No newline at end of file
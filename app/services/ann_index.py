@@ -0,0 +1,172 @@
+from typing import List, Optional
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+
+
+class ExactSearcher:
+    """Brute-force candidate retrieval: every row is scored."""
+
+    name = "exact"
+
+    def rebuild(self, vectors: np.ndarray) -> None:
+        pass
+
+    def add(self, row: int, vector: np.ndarray) -> None:
+        pass
+
+    def needs_rebuild(self, size: int) -> bool:
+        return False
+
+    def truncate(self, size: int) -> None:
+        pass
+
+    def widen(self, n_probe: Optional[int]) -> Optional[int]:
+        return None
+
+    def candidate_rows(self, query: np.ndarray, n_probe: Optional[int] = None) -> Optional[np.ndarray]:
+        """Rows to score for `query`, or None to score all of them."""
+        return None
+
+
+class IVFSearcher:
+    """
+    Inverted-file approximate search.
+
+    Rows are partitioned by spherical k-means on the normalized embeddings;
+    a query only scores the rows of its `n_probe` closest partitions. Until
+    enough rows exist to train the partitions the searcher falls back to a
+    full scan.
+    """
+
+    name = "ivf"
+
+    def __init__(self, n_lists: int = 0, n_probe: int = 8, min_train_size: int = 10000,
+                 train_sample_size: int = 100000, kmeans_iterations: int = 10, seed: int = 0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.train_sample_size = train_sample_size
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []
+        self._trained_size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _num_lists(self, size: int) -> int:
+        if self.n_lists:
+            return min(self.n_lists, size)
+        # Standard IVF sizing: about sqrt(n) partitions
+        return max(1, int(np.sqrt(size)))
+
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means: centroids are re-normalized means of their members."""
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if len(vectors) > self.train_sample_size:
+            sample = vectors[rng.choice(len(vectors), self.train_sample_size, replace=False)]
+        sample = sample.astype(np.float32, copy=False)
+
+        k = min(self._num_lists(len(vectors)), len(sample))
+        centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignments = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            order = np.argsort(assignments, kind="stable")
+            present, starts = np.unique(assignments[order], return_index=True)
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty partitions from random rows so no list stays unused
+            if empty.any():
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+            centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        return centroids
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size].astype(np.float32, copy=False)
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+    def rebuild(self, vectors: np.ndarray) -> None:
+        if len(vectors) < self.min_train_size:
+            self._centroids = None
+            self._lists, self._list_arrays = [], []
+            self._trained_size = 0
+            return
+
+        self._centroids = self._train(vectors)
+        assignments = self._assign(vectors, self._centroids)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(len(self._centroids))]
+        self._list_arrays = [None] * len(self._lists)
+        self._trained_size = len(vectors)
+        logger.info(f"Trained IVF index with {len(self._centroids)} lists over {len(vectors)} rows")
+
+    def add(self, row: int, vector: np.ndarray) -> None:
+        if not self.trained:
+            return
+        list_id = int(np.argmax(self._centroids @ vector))
+        self._lists[list_id].append(row)
+        self._list_arrays[list_id] = None
+
+    def needs_rebuild(self, size: int) -> bool:
+        """Retrain once the corpus reaches the training size or doubles since the last training."""
+        if not self.trained:
+            return size >= self.min_train_size
+        return size >= 2 * self._trained_size
+
+    def truncate(self, size: int) -> None:
+        """Forget rows at or past `size`, e.g. those of a rolled-back batch."""
+        if not self.trained:
+            return
+        for list_id, rows in enumerate(self._lists):
+            # Rows are appended in increasing order, so dropped rows sit at the end of each list
+            if rows and rows[-1] >= size:
+                while rows and rows[-1] >= size:
+                    rows.pop()
+                self._list_arrays[list_id] = None
+
+    def _list_array(self, list_id: int) -> np.ndarray:
+        array = self._list_arrays[list_id]
+        if array is None:
+            array = np.asarray(self._lists[list_id], dtype=np.int64)
+            self._list_arrays[list_id] = array
+        return array
+
+    def widen(self, n_probe: Optional[int]) -> Optional[int]:
+        """Probe count doubled from `n_probe` (default `self.n_probe`), or None once every list is probed."""
+        n_probe = n_probe or self.n_probe
+        if not self.trained or n_probe >= len(self._centroids):
+            return None
+        return min(2 * n_probe, len(self._centroids))
+
+    def candidate_rows(self, query: np.ndarray, n_probe: Optional[int] = None) -> Optional[np.ndarray]:
+        if not self.trained:
+            return None
+        centroid_scores = self._centroids @ query
+        n_probe = min(n_probe or self.n_probe, len(centroid_scores))
+        probes = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        return np.concatenate([self._list_array(int(list_id)) for list_id in probes])
+
+
+def create_searcher(mode: Optional[str] = None):
+    """Build the candidate searcher selected by `THEME_INDEX_MODE`."""
+    mode = (mode or settings.THEME_INDEX_MODE).lower()
+    if mode == "exact":
+        return ExactSearcher()
+    if mode == "ivf":
+        return IVFSearcher(
+            n_lists=settings.IVF_N_LISTS,
+            n_probe=settings.IVF_N_PROBE,
+            min_train_size=settings.IVF_MIN_TRAIN_SIZE
+        )
+    raise ValueError(f"Unknown theme index mode: {mode}")
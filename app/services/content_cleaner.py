@@ -0,0 +1,200 @@
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Iterable, Iterator, Optional, Tuple
+import importlib.util
+import multiprocessing
+import queue
+import re
+import threading
+from bs4 import BeautifulSoup
+from app.core.config import settings
+from app.core.logging import logger
+
+URL_PATTERN = re.compile(r'http\S+|www.\S+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+ARTIFACT_PATTERN = re.compile(r'Read full article|Read more')
+
+# BeautifulSoup tree builders in order of preference, with the module each one needs
+PARSER_BACKENDS = (("lxml", "lxml"), ("html5lib", "html5lib"), ("html.parser", None))
+
+
+def resolve_parser(name: Optional[str] = None) -> str:
+    """Pick the BeautifulSoup parser for `HTML_PARSER`; "auto" uses the fastest one installed."""
+    name = (name or settings.HTML_PARSER).lower()
+    if name != "auto":
+        return name
+    for parser, module in PARSER_BACKENDS:
+        if module is None or importlib.util.find_spec(module) is not None:
+            return parser
+    return "html.parser"
+
+
+_parser: Optional[str] = None
+
+
+def clean_content(content: str, parser: Optional[str] = None) -> str:
+    """Clean HTML content and extract meaningful text."""
+    global _parser
+    if parser is None:
+        if _parser is None:
+            _parser = resolve_parser()
+        parser = _parser
+
+    # Remove HTML tags
+    text = BeautifulSoup(content, parser).get_text() if content else ""
+
+    # Remove URLs
+    text = URL_PATTERN.sub('', text)
+
+    # Remove extra whitespace and newlines
+    text = WHITESPACE_PATTERN.sub(' ', text)
+
+    # Remove common HTML artifacts
+    text = ARTIFACT_PATTERN.sub('', text)
+
+    return text.strip()
+
+
+def _clean_item(item: Tuple[int, str]) -> Tuple[int, str]:
+    key, content = item
+    return key, clean_content(content)
+
+
+class ContentCleaner:
+    """
+    HTML cleaning stage of the ingestion pipeline.
+
+    With `CLEAN_WORKERS` > 0, documents are cleaned on a process pool so
+    BeautifulSoup and the regex passes run outside the interpreter doing
+    the encoding. Results stream back in submission order through a bounded
+    queue of `CLEAN_QUEUE_SIZE` in-flight documents, so memory use does not
+    grow with the size of the feed. If a pool worker dies, the broken pool
+    is dropped, the rest of the stream is cleaned inline and the next
+    stream starts a new pool.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None):
+        self.workers = settings.CLEAN_WORKERS if workers is None else workers
+        self.queue_size = queue_size or settings.CLEAN_QUEUE_SIZE
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers only import this module, not the loaded model or open connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Started HTML cleaning pool with {self.workers} workers ({resolve_parser()} parser)")
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken pool so the next stream starts a new one."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        logger.error("HTML cleaning pool broke; cleaning inline until the next run starts a new pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _failed(key: int, error: Exception) -> Tuple[int, None]:
+        logger.error(f"Error cleaning document {key}: {str(error)}")
+        return key, None
+
+    def _clean_inline(self, item: Tuple[int, str]) -> Tuple[int, Optional[str]]:
+        try:
+            return _clean_item(item)
+        except Exception as e:
+            return self._failed(item[0], e)
+
+    def clean_stream(self, items: Iterable[Tuple[int, str]],
+                     timer: Callable[[], ContextManager] = nullcontext) -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Clean (key, html) pairs, yielding (key, text) in input order. A document
+        that fails to clean yields (key, None) instead of ending the stream.
+        Only the cleaning itself (or waiting for the pool's result) runs inside
+        `timer()`, not producing `items`, so a caller can time the stage alone.
+        """
+        if self.workers <= 0:
+            for item in items:
+                with timer():
+                    result = self._clean_inline(item)
+                yield result
+            return
+
+        executor = self._get_executor()
+        in_flight: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        done = object()
+        errors = []
+
+        def submit():
+            pool = executor
+            try:
+                for item in items:
+                    future = None
+                    if pool is not None:
+                        try:
+                            future = pool.submit(_clean_item, item)
+                        except BrokenProcessPool:
+                            # The consumer cleans this and every later document inline
+                            self._discard_executor(pool)
+                            pool = None
+                    # Blocks while the consumer is `queue_size` documents behind
+                    while not stop.is_set():
+                        try:
+                            in_flight.put((item, future), timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        if future is not None:
+                            future.cancel()
+                        return
+            except Exception as e:
+                errors.append(e)
+            finally:
+                in_flight.put(done)
+
+        producer = threading.Thread(target=submit, daemon=True)
+        producer.start()
+        try:
+            while True:
+                submitted = in_flight.get()
+                if submitted is done:
+                    break
+                item, future = submitted
+                with timer():
+                    if future is None:
+                        result = self._clean_inline(item)
+                    else:
+                        try:
+                            result = future.result()
+                        except (BrokenProcessPool, CancelledError):
+                            # Futures of a broken pool fail or are cancelled when it is shut down
+                            self._discard_executor(executor)
+                            result = self._clean_inline(item)
+                        except Exception as e:
+                            result = self._failed(item[0], e)
+                yield result
+        finally:
+            # Release the producer if the consumer stopped early
+            stop.set()
+            while producer.is_alive():
+                try:
+                    in_flight.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
+        if errors:
+            raise errors[0]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.db.session import ReadSessionLocal
+from app.models import AppState
+
+DATA_VERSION_KEY = "data_version"
+THEME_LAYOUT_KEY = "theme_layout_version"  # Bumped when themes are rewritten wholesale, e.g. by re-clustering
+
+
+def get_counter(key: str, db: Optional[Session] = None) -> int:
+    """Current value of an `app_state` counter, shared by all workers through the database."""
+    session = db or ReadSessionLocal()
+    try:
+        value = session.query(AppState.value).filter(AppState.key == key).scalar()
+        return value or 0
+    finally:
+        if db is None:
+            session.close()
+
+
+def bump_counter(db: Session, key: str) -> None:
+    """Increment an `app_state` counter inside the caller's transaction, creating it if needed."""
+    result = db.execute(
+        update(AppState)
+        .where(AppState.key == key)
+        .values(value=AppState.value + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        db.add(AppState(key=key, value=1))
+        db.flush()
+
+
+def get_data_version(db: Optional[Session] = None) -> int:
+    """Current version of the theme and post data."""
+    return get_counter(DATA_VERSION_KEY, db)
+
+
+def bump_data_version(db: Session) -> None:
+    """
+    Advance the data version inside the caller's transaction, so cached API responses
+    are invalidated exactly when the change that caused the bump is committed.
+    """
+    bump_counter(db, DATA_VERSION_KEY)
+
+
+def get_theme_layout_version(db: Optional[Session] = None) -> int:
+    return get_counter(THEME_LAYOUT_KEY, db)
+
+
+def bump_theme_layout_version(db: Session) -> None:
+    """Signal other processes that their in-memory theme index must be reloaded."""
+    bump_counter(db, THEME_LAYOUT_KEY)
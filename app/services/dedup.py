@@ -0,0 +1,205 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import zlib
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models import Post, PostFingerprint, PostFingerprintBand
+
+SIGNATURE_DTYPE = np.uint32
+_MAX_HASH = 0xFFFFFFFF
+_PRIME = 4294967311  # Smallest prime above 2**32
+_QUERY_CHUNK = 500  # Keeps IN lists below SQLite's bound-parameter limit
+
+
+def signature_to_bytes(signature: np.ndarray) -> bytes:
+    return np.asarray(signature, dtype=SIGNATURE_DTYPE).tobytes()
+
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=SIGNATURE_DTYPE)
+
+
+def band_buckets(signature: np.ndarray, bands: int) -> List[int]:
+    """
+    LSH bucket of each band of a signature. The band number is part of the hash,
+    so buckets from different bands never collide and a single indexed column suffices.
+    """
+    rows = len(signature) // bands
+    buckets = []
+    for band in range(bands):
+        digest = hashlib.blake2b(
+            band.to_bytes(2, "little") + signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8
+        ).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))  # Fits SQLite's signed 64-bit integers
+    return buckets
+
+
+def fingerprint_rows(post_id: int, signature: np.ndarray, bands: int) -> Tuple[dict, List[dict]]:
+    """The `post_fingerprints` row and `post_fingerprint_bands` rows for a post."""
+    fingerprint = {"post_id": post_id, "signature": signature_to_bytes(signature)}
+    return fingerprint, [{"post_id": post_id, "bucket": bucket} for bucket in band_buckets(signature, bands)]
+
+
+@dataclass
+class DuplicateMatch:
+    """The original an article duplicates: a stored post or an entry from the current run."""
+    similarity: float
+    post_id: Optional[int] = None
+    entry: Any = None
+
+
+class NearDuplicateFilter:
+    """
+    MinHash fingerprints of cleaned article text with a banded LSH lookup.
+
+    Signatures are stored per post; each signature is split into `bands` bands
+    whose hashes are indexed, so candidates are found with one indexed IN query
+    and then verified by comparing full signatures (the fraction of equal
+    MinHash values estimates the Jaccard similarity of the word shingles).
+    Entries seen earlier in the current run are matched from memory.
+    """
+
+    def __init__(self, threshold: float = None, num_perm: int = None, bands: int = None,
+                 shingle_size: int = None, seed: int = 1):
+        self.threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        self.num_perm = num_perm or settings.DEDUP_NUM_PERM
+        self.bands = bands or settings.DEDUP_BANDS
+        self.shingle_size = shingle_size or settings.DEDUP_SHINGLE_SIZE
+        if self.num_perm % self.bands:
+            raise ValueError(f"DEDUP_BANDS ({self.bands}) must divide DEDUP_NUM_PERM ({self.num_perm})")
+
+        # Universal hash family h(x) = (a * x + b) mod p; a, b < 2**32 keeps a * x + b within uint64
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MAX_HASH, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MAX_HASH, size=self.num_perm, dtype=np.uint64)
+        self.start_run()
+
+    def start_run(self) -> None:
+        """Forget entries from the previous run and reset the per-run counters."""
+        self._run_buckets: Dict[int, List[Tuple[np.ndarray, Any]]] = defaultdict(list)
+        self.checked = 0
+        self.duplicates = 0
+        self.avoided_encodes = 0
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the text's word shingles, or None when it is too short to compare."""
+        words = text.lower().split()
+        if len(words) < self.shingle_size:
+            return None
+        k = self.shingle_size
+        shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        values = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return (values.min(axis=0) & _MAX_HASH).astype(SIGNATURE_DTYPE)
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float(np.mean(first == second))
+
+    def _stored_candidates(self, db: Session, buckets: set) -> Tuple[Dict[int, set], Dict[int, np.ndarray]]:
+        post_ids_by_bucket = defaultdict(set)
+        bucket_list = list(buckets)
+        for start in range(0, len(bucket_list), _QUERY_CHUNK):
+            rows = db.query(PostFingerprintBand.bucket, PostFingerprintBand.post_id).filter(
+                PostFingerprintBand.bucket.in_(bucket_list[start:start + _QUERY_CHUNK])
+            )
+            for bucket, post_id in rows:
+                post_ids_by_bucket[bucket].add(post_id)
+
+        signatures = {}
+        post_ids = list(set().union(*post_ids_by_bucket.values())) if post_ids_by_bucket else []
+        for start in range(0, len(post_ids), _QUERY_CHUNK):
+            rows = db.query(PostFingerprint.post_id, PostFingerprint.signature).filter(
+                PostFingerprint.post_id.in_(post_ids[start:start + _QUERY_CHUNK])
+            )
+            for post_id, signature in rows:
+                signatures[post_id] = signature_from_bytes(signature)
+        return post_ids_by_bucket, signatures
+
+    def find_duplicates(self, db: Session, items: List[Tuple[Optional[np.ndarray], Any]]) -> List[Optional[DuplicateMatch]]:
+        """
+        Match (signature, entry) pairs against stored posts and earlier entries of this run.
+        Returns the best match at or above the threshold for each item, or None. Items
+        without a match are remembered until the run ends so later duplicates in the run
+        are linked to them; pass a small reference as `entry`, not the article itself.
+        """
+        buckets = [band_buckets(signature, self.bands) if signature is not None else [] for signature, _ in items]
+        post_ids_by_bucket, stored_signatures = self._stored_candidates(db, {b for item in buckets for b in item})
+
+        matches = []
+        for (signature, entry), item_buckets in zip(items, buckets):
+            if signature is None:
+                matches.append(None)
+                continue
+            self.checked += 1
+
+            best = None
+            post_ids = set().union(*(post_ids_by_bucket.get(bucket, ()) for bucket in item_buckets))
+            for post_id in post_ids:
+                similarity = self.similarity(signature, stored_signatures[post_id]) if post_id in stored_signatures else 0.0
+                if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                    best = DuplicateMatch(similarity=similarity, post_id=post_id)
+            for bucket in item_buckets:
+                for other_signature, other_entry in self._run_buckets.get(bucket, ()):
+                    similarity = self.similarity(signature, other_signature)
+                    if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                        best = DuplicateMatch(similarity=similarity, entry=other_entry)
+
+            if best is None:
+                for bucket in item_buckets:
+                    self._run_buckets[bucket].append((signature, entry))
+            else:
+                self.duplicates += 1
+            matches.append(best)
+        return matches
+
+
+def backfill_post_fingerprints(dedup: NearDuplicateFilter, batch_size: int = 1000) -> int:
+    """
+    Fingerprint stored posts that do not have a fingerprint yet, so articles ingested
+    before near-duplicate detection can be matched. Returns the number of posts fingerprinted.
+    """
+    db = SessionLocal()
+    total = 0
+    last_id = 0
+    try:
+        while True:
+            rows = (
+                db.query(Post.id, Post.content)
+                .outerjoin(PostFingerprint, PostFingerprint.post_id == Post.id)
+                .filter(Post.id > last_id, PostFingerprint.post_id.is_(None))
+                .order_by(Post.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            fingerprints, bands = [], []
+            for row in rows:
+                signature = dedup.signature(row.content or "")
+                if signature is None:
+                    continue
+                fingerprint, fingerprint_bands = fingerprint_rows(row.id, signature, dedup.bands)
+                fingerprints.append(fingerprint)
+                bands.extend(fingerprint_bands)
+            if fingerprints:
+                db.bulk_insert_mappings(PostFingerprint, fingerprints)
+                db.bulk_insert_mappings(PostFingerprintBand, bands)
+            db.commit()
+
+            total += len(fingerprints)
+            last_id = rows[-1].id
+            logger.info(f"Backfilled fingerprints for {total} posts (last post ID: {last_id})")
+    finally:
+        db.close()
+
+    logger.info(f"Fingerprint backfill complete. Total posts fingerprinted: {total}")
+    return total
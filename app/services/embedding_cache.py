@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.embeddings import EMBEDDING_DTYPE
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC, collapsed whitespace, trimmed."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """Content address of an embedding: hash of the model name and normalized text."""
+    return hashlib.sha1(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of text embeddings keyed by `cache_key`.
+
+    A bounded in-memory LRU serves hot entries. When `path` is set, every
+    new embedding is also written to a SQLite sidecar file, so entries
+    evicted from memory (and entries from earlier runs) are still found on
+    disk and promoted back into memory on access.
+    """
+
+    def __init__(self, max_entries: int = 20000, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_disk(self) -> Optional[sqlite3.Connection]:
+        if self.path and self._disk is None:
+            self._disk = sqlite3.connect(self.path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode = WAL")
+            self._disk.execute("PRAGMA synchronous = NORMAL")
+            self._disk.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            logger.info(f"Opened embedding cache file: {self.path}")
+        return self._disk
+
+    def _remember(self, key: str, embedding: np.ndarray) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the cached embeddings for the keys that are present."""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                embedding = self._memory.get(key)
+                if embedding is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = embedding
+                else:
+                    missing.append(key)
+
+            disk = self._get_disk() if missing else None
+            if disk is not None:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = disk.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    for key, vector in rows:
+                        embedding = np.frombuffer(vector, dtype=EMBEDDING_DTYPE)
+                        self._remember(key, embedding)
+                        found[key] = embedding
+                        self.disk_hits += 1
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store embeddings in memory and, when configured, on disk."""
+        if not items:
+            return
+        with self._lock:
+            for key, embedding in items.items():
+                self._remember(key, np.asarray(embedding, dtype=EMBEDDING_DTYPE))
+            disk = self._get_disk()
+            if disk is not None:
+                disk.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()) for key, embedding in items.items()]
+                )
+                disk.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "disk_path": self.path or None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+
+embedding_cache = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_SIZE,
+    path=settings.EMBEDDING_CACHE_PATH or None
+)
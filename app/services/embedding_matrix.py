@@ -0,0 +1,169 @@
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional, Tuple
+import fcntl
+import os
+import struct
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.quantization import PRECISIONS, SCALE_DTYPE, quantize, storage_dtype
+
+_MAGIC = b"RSSEMB01"
+_HEADER = struct.Struct("<8sIIQ")  # magic, dim, precision code, published row count
+_HEADER_SIZE = 64
+_LENGTH_OFFSET = 16
+POST_ID_DTYPE = np.int64
+
+
+class SharedEmbeddingMatrix:
+    """
+    Append-only embedding matrix in a memory-mapped file shared by all workers.
+
+    The data file holds a small header followed by the rows at the header's
+    precision; `<path>.ids` maps each row to its post id and `<path>.scales`
+    holds the per-row scales (see `quantization`). Readers map the files
+    read-only, so every worker on the host shares the same page cache instead
+    of keeping a private copy of the vectors.
+
+    Appends take an exclusive `flock` on `<path>.lock`, write the rows and
+    sidecars past the published length, and only then publish the new length
+    with a single 8-byte header write. Readers never look beyond the published
+    length, so they see either the old or the new rows, never a partial row.
+    """
+
+    def __init__(self, path: str, precision: Optional[str] = None):
+        self.path = path
+        self.ids_path = f"{path}.ids"
+        self.scales_path = f"{path}.scales"
+        self.lock_path = f"{path}.lock"
+        self.precision = precision or settings.EMBEDDING_PRECISION
+        self.dim = 0
+        self.vectors: Optional[np.ndarray] = None
+        self.post_ids = np.zeros(0, dtype=POST_ID_DTYPE)
+        self.scales = np.zeros(0, dtype=SCALE_DTYPE)
+        self._mapped = 0
+
+    @property
+    def length(self) -> int:
+        """Rows mapped by this process (call `refresh` to pick up rows published since)."""
+        return self._mapped
+
+    @property
+    def row_bytes(self) -> int:
+        return self.dim * np.dtype(storage_dtype(self.precision)).itemsize
+
+    def _read_header(self) -> Optional[Tuple[int, str, int]]:
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read(_HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, dim, code, length = _HEADER.unpack(data)
+        if magic != _MAGIC:
+            raise ValueError(f"{self.path} is not an embedding matrix file")
+        return dim, PRECISIONS[code], length
+
+    def refresh(self) -> int:
+        """Map the rows published so far; cheap when nothing changed. Returns the row count."""
+        header = self._read_header()
+        if header is None:
+            return self._mapped
+        dim, precision, length = header
+        if precision != self.precision and self._mapped == 0:
+            logger.warning(f"Embedding matrix {self.path} is stored as {precision}, not {self.precision}; using {precision}")
+        self.dim, self.precision = dim, precision
+        if length == self._mapped:
+            return length
+        if length == 0:
+            self.vectors = np.zeros((0, dim), dtype=storage_dtype(precision))
+        else:
+            self.vectors = np.memmap(self.path, dtype=storage_dtype(precision), mode="r",
+                                     offset=_HEADER_SIZE, shape=(length, dim))
+            self.post_ids = np.memmap(self.ids_path, dtype=POST_ID_DTYPE, mode="r", shape=(length,))
+            self.scales = np.memmap(self.scales_path, dtype=SCALE_DTYPE, mode="r", shape=(length,))
+        self._mapped = length
+        return length
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _create(self, dim: int) -> None:
+        with open(self.path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, dim, PRECISIONS.index(self.precision), 0).ljust(_HEADER_SIZE, b"\0"))
+        for path in (self.ids_path, self.scales_path):
+            open(path, "wb").close()
+        logger.info(f"Created {self.precision} embedding matrix {self.path} ({dim} dims)")
+
+    def _append_locked(self, post_ids, embeddings: np.ndarray) -> range:
+        embeddings = np.atleast_2d(embeddings)
+        header = self._read_header()
+        if header is None:
+            self._create(embeddings.shape[1])
+            header = self._read_header()
+        self.dim, self.precision, start = header
+        if embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding has {embeddings.shape[1]} dimensions, matrix has {self.dim}")
+
+        codes, scales = quantize(embeddings, self.precision)
+        ids = np.asarray(post_ids, dtype=POST_ID_DTYPE)
+        # Rows past the published length are leftovers of an interrupted append and are overwritten
+        with open(self.path, "r+b") as f:
+            os.pwrite(f.fileno(), codes.tobytes(), _HEADER_SIZE + start * self.row_bytes)
+        with open(self.ids_path, "r+b") as f:
+            os.pwrite(f.fileno(), ids.tobytes(), start * ids.itemsize)
+        with open(self.scales_path, "r+b") as f:
+            os.pwrite(f.fileno(), scales.tobytes(), start * scales.itemsize)
+        with open(self.path, "r+b") as f:
+            os.pwrite(f.fileno(), struct.pack("<Q", start + len(codes)), _LENGTH_OFFSET)
+        return range(start, start + len(codes))
+
+    def append(self, post_ids, embeddings: np.ndarray) -> range:
+        """
+        Append normalized embeddings with the ids of their (committed) posts and
+        publish them. Returns the rows they were written to.
+        """
+        with self._write_lock():
+            rows = self._append_locked(post_ids, embeddings)
+        self.refresh()
+        return rows
+
+    def extend(self, load_rows: Callable[[int], Iterable[Tuple[list, np.ndarray]]]) -> int:
+        """
+        Append the (post ids, normalized embeddings) chunks yielded by
+        `load_rows(after_post_id)`, where `after_post_id` is the largest post id
+        already stored. Holding the lock throughout keeps concurrent callers
+        from appending the same posts twice. Returns the rows appended.
+        """
+        appended = 0
+        with self._write_lock():
+            self.refresh()
+            for post_ids, embeddings in load_rows(self.max_post_id()):
+                appended += len(self._append_locked(post_ids, embeddings))
+        self.refresh()
+        return appended
+
+    def max_post_id(self) -> int:
+        """Largest post id stored in the mapped rows, 0 when empty."""
+        if self._mapped == 0:
+            return 0
+        return int(max(0, self.post_ids.max()))
+
+    def remove(self) -> None:
+        """Delete the matrix files, e.g. before rebuilding it from the database."""
+        with self._write_lock():
+            for path in (self.path, self.ids_path, self.scales_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.vectors = None
+        self.post_ids = np.zeros(0, dtype=POST_ID_DTYPE)
+        self.scales = np.zeros(0, dtype=SCALE_DTYPE)
+        self._mapped = 0
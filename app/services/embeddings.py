@@ -0,0 +1,148 @@
+from typing import Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.models import Post, PostEmbedding, Theme
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.quantization import vector_from_bytes, vector_to_bytes
+
+EMBEDDING_DTYPE = np.float32
+CENTROID_SUM_DTYPE = np.float64
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector or a matrix of row vectors."""
+    embeddings = np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def embedding_to_bytes(embedding: np.ndarray, precision: Optional[str] = None) -> bytes:
+    """Serialize an embedding for storage in the database at `precision` (`EMBEDDING_PRECISION`)."""
+    return vector_to_bytes(embedding, precision or settings.EMBEDDING_PRECISION)
+
+
+def embedding_from_bytes(data: bytes, dim: Optional[int] = None, precision: str = "float32") -> np.ndarray:
+    """Deserialize an embedding stored with `embedding_to_bytes` as float32."""
+    return vector_from_bytes(data, precision, dim)
+
+
+def centroid_sum_to_bytes(embedding_sum: np.ndarray) -> bytes:
+    """Serialize a theme's running embedding sum."""
+    return np.asarray(embedding_sum, dtype=CENTROID_SUM_DTYPE).tobytes()
+
+
+def centroid_sum_from_bytes(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """Deserialize a theme's running embedding sum (None when not computed yet)."""
+    if data is None:
+        return None
+    return np.frombuffer(data, dtype=CENTROID_SUM_DTYPE)
+
+
+def make_post_embedding(embedding: np.ndarray, post_id: Optional[int] = None) -> PostEmbedding:
+    """Build a `PostEmbedding` row for the configured model."""
+    return PostEmbedding(
+        post_id=post_id,
+        model_name=settings.MODEL_NAME,
+        dim=int(embedding.shape[0]),
+        vector=embedding_to_bytes(embedding),
+        precision=settings.EMBEDDING_PRECISION
+    )
+
+
+def store_post_embeddings(db: Session, post_ids, embeddings: np.ndarray) -> None:
+    """Insert or replace stored embeddings for the given posts (caller commits)."""
+    for post_id, embedding in zip(post_ids, embeddings):
+        db.merge(make_post_embedding(embedding, post_id=post_id))
+
+
+def backfill_post_embeddings(nlp_service, batch_size: int = 256, force: bool = False) -> int:
+    """
+    Encode and store embeddings for posts that do not have one yet.
+    With `force`, posts embedded with a different model are re-encoded as well.
+    Returns the number of posts that were embedded.
+    """
+    db = SessionLocal()
+    total = 0
+    last_id = 0
+    try:
+        while True:
+            query = (
+                db.query(Post.id, Post.thesis_text)
+                .outerjoin(PostEmbedding, PostEmbedding.post_id == Post.id)
+                .filter(Post.id > last_id)
+            )
+            if force:
+                query = query.filter(
+                    (PostEmbedding.post_id.is_(None)) | (PostEmbedding.model_name != settings.MODEL_NAME)
+                )
+            else:
+                query = query.filter(PostEmbedding.post_id.is_(None))
+            rows = query.order_by(Post.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            post_ids = [row.id for row in rows]
+            embeddings = nlp_service.encode([row.thesis_text for row in rows])
+            store_post_embeddings(db, post_ids, embeddings)
+            db.commit()
+
+            total += len(rows)
+            last_id = post_ids[-1]
+            logger.info(f"Backfilled embeddings for {total} posts (last post ID: {last_id})")
+    finally:
+        db.close()
+
+    logger.info(f"Embedding backfill complete. Total posts embedded: {total}")
+    return total
+
+
+def rebuild_theme_centroids(only_missing: bool = True, batch_size: int = 10000) -> int:
+    """
+    Recompute each theme's running embedding sum and count from its posts' stored embeddings.
+    With `only_missing`, only themes that have never had a sum computed are rebuilt.
+    Returns the number of themes updated.
+    """
+    db = SessionLocal()
+    try:
+        theme_query = db.query(Theme.id)
+        if only_missing:
+            theme_query = theme_query.filter(Theme.embedding_sum.is_(None))
+        theme_ids = [row.id for row in theme_query]
+        if not theme_ids:
+            return 0
+
+        sums, counts = {}, {}
+        for start in range(0, len(theme_ids), batch_size):
+            chunk = theme_ids[start:start + batch_size]
+            rows = (
+                db.query(Post.theme_id, PostEmbedding.vector, PostEmbedding.precision)
+                .join(PostEmbedding, PostEmbedding.post_id == Post.id)
+                .filter(Post.theme_id.in_(chunk))
+                .filter(PostEmbedding.model_name == settings.MODEL_NAME)
+                .yield_per(batch_size)
+            )
+            for row in rows:
+                embedding = embedding_from_bytes(row.vector, precision=row.precision).astype(CENTROID_SUM_DTYPE)
+                if row.theme_id in sums:
+                    sums[row.theme_id] += embedding
+                else:
+                    sums[row.theme_id] = embedding
+                counts[row.theme_id] = counts.get(row.theme_id, 0) + 1
+
+        db.bulk_update_mappings(Theme, [
+            {
+                "id": theme_id,
+                "embedding_sum": centroid_sum_to_bytes(sums[theme_id]) if theme_id in sums else None,
+                "embedding_count": counts.get(theme_id, 0)
+            }
+            for theme_id in theme_ids
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    logger.info(f"Rebuilt embedding centroids for {len(theme_ids)} themes")
+    return len(theme_ids)
@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Collection, Dict, List, Optional
+from urllib.parse import urlparse
+import asyncio
+import time
+import httpx
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models import FeedState
+from app.services.poll_policy import schedule_next_poll
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one feed."""
+    feed_url: str
+    status: Optional[int] = None
+    content: Optional[bytes] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    # Newest entry seen in this fetch, persisted as the feed's watermark
+    watermark_id: Optional[str] = None
+    watermark_published_at: Optional[datetime] = None
+    # Observations that drive the feed's adaptive polling interval
+    new_entries: int = 0
+    publish_interval_seconds: Optional[float] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and (self.status == 304 or 200 <= self.status < 300)
+
+
+class FeedFetcher:
+    """
+    Asynchronous feed downloader.
+
+    All requests share one pooled HTTP client; a per-host semaphore bounds
+    concurrent requests to the same site. ETag/Last-Modified validators from
+    the previous fetch are sent as conditional request headers, so unchanged
+    feeds come back as 304 without a body.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # The client and semaphores are bound to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.FETCH_TIMEOUT_SECONDS, connect=settings.FETCH_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.FETCH_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.FETCH_MAX_CONNECTIONS
+                ),
+                headers={"User-Agent": f"{settings.PROJECT_NAME}/{settings.VERSION}"},
+                follow_redirects=True
+            )
+            self._loop = loop
+            self._host_semaphores = {}
+        return self._client
+
+    def _host_semaphore(self, feed_url: str) -> asyncio.Semaphore:
+        host = urlparse(feed_url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(settings.FETCH_MAX_PER_HOST)
+        return self._host_semaphores[host]
+
+    async def fetch(self, feed_url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchResult:
+        """Fetch one feed, sending conditional headers when validators are known."""
+        result = FetchResult(feed_url=feed_url, etag=etag, last_modified=last_modified)
+        started = time.perf_counter()
+
+        if urlparse(feed_url).scheme not in ("http", "https"):
+            # Local files and other sources feedparser understands are read off the event loop
+            try:
+                path = feed_url[len("file://"):] if feed_url.startswith("file://") else feed_url
+                result.content = await asyncio.to_thread(_read_file, path)
+                result.status = 200
+            except OSError as e:
+                result.error = str(e)
+            result.elapsed = time.perf_counter() - started
+            return result
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        client = self._get_client()
+        try:
+            async with self._host_semaphore(feed_url):
+                response = await client.get(feed_url, headers=headers)
+            result.status = response.status_code
+            if response.status_code == 304:
+                logger.info(f"Feed not modified since last fetch: {feed_url}")
+            elif response.is_success:
+                result.content = response.content
+                result.etag = response.headers.get("ETag")
+                result.last_modified = response.headers.get("Last-Modified")
+            else:
+                result.error = f"HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            result.error = f"{type(e).__name__}: {str(e)}"
+        result.elapsed = time.perf_counter() - started
+
+        if result.error:
+            logger.error(f"Error fetching feed {feed_url}: {result.error}")
+        return result
+
+    async def fetch_all(self, feed_urls: List[str]) -> List[FetchResult]:
+        """Fetch feeds concurrently using each feed's stored validators."""
+        states = self.load_states(feed_urls)
+        return await asyncio.gather(*[
+            self.fetch(
+                feed_url,
+                etag=states[feed_url].etag if feed_url in states else None,
+                last_modified=states[feed_url].last_modified if feed_url in states else None
+            )
+            for feed_url in feed_urls
+        ])
+
+    def load_states(self, feed_urls: List[str]) -> Dict[str, FeedState]:
+        db = SessionLocal()
+        try:
+            states = db.query(FeedState).filter(FeedState.feed_url.in_(feed_urls)).all()
+            db.expunge_all()
+            return {state.feed_url: state for state in states}
+        finally:
+            db.close()
+
+    def save_states(self, results: List[FetchResult], failed_feeds: Collection[str] = ()) -> None:
+        """
+        Persist validators, fetch status and the next poll time for each feed. Call this
+        after the feeds' entries are stored, passing the feeds whose entries could not be
+        stored as `failed_feeds`: they keep their previous validators, so a failed run is
+        not hidden behind a 304 next time, and are scheduled as failures to back off.
+        Validators and watermarks are only taken from successful fetches.
+        """
+        if not results:
+            return
+        db = SessionLocal()
+        try:
+            states = {
+                state.feed_url: state
+                for state in db.query(FeedState).filter(FeedState.feed_url.in_([r.feed_url for r in results]))
+            }
+            for result in results:
+                state = states.get(result.feed_url)
+                if state is None:
+                    state = FeedState(feed_url=result.feed_url)
+                    db.add(state)
+                    states[result.feed_url] = state
+                state.last_status = result.status
+                state.last_fetched_at = datetime.utcnow()
+                if result.ok and not result.not_modified and result.feed_url not in failed_feeds:
+                    state.etag = result.etag
+                    state.last_modified = result.last_modified
+                if result.watermark_published_at is not None and (
+                    state.last_entry_published_at is None
+                    or result.watermark_published_at >= state.last_entry_published_at
+                ):
+                    state.last_entry_id = result.watermark_id
+                    state.last_entry_published_at = result.watermark_published_at
+                ok = result.ok and result.feed_url not in failed_feeds
+                schedule_next_poll(state, ok, result.new_entries, result.publish_interval_seconds)
+            db.commit()
+        finally:
+            db.close()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
@@ -1,106 +1,405 @@
 import feedparser
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict
-import re
-from bs4 import BeautifulSoup
+from typing import List, Optional, Set, Tuple
+import asyncio
+import itertools
+import threading
+import numpy as np
 from app.core.config import settings
 from app.services.nlp_service import NLPService
 from app.services.theme_service import ThemeService
 from app.db.session import SessionLocal
-from app.models import Post
+from app.models import Post, PostEmbedding, FeedState
+from app.services.dedup import NearDuplicateFilter
+from app.services.embeddings import embedding_from_bytes
+from app.services.post_writer import PostWriter, StoredPost
+from app.services.content_cleaner import ContentCleaner, clean_content
+from app.services.feed_fetcher import FeedFetcher, FetchResult
+from app.services.ingest_progress import IngestProgress
+from app.services.poll_policy import estimate_publish_interval
 from app.core.logging import logger
 
+@dataclass
+class PendingEntry:
+    """A new feed entry moving through the ingestion stages."""
+    feed_url: str
+    title: str
+    url: str
+    content: str
+    published_at: datetime
+    sentences: List[str] = field(default_factory=list)
+    thesis_text: str = ""
+    thesis_embedding: Optional[np.ndarray] = None
+    fingerprint: Optional[np.ndarray] = None
+    theme_id: Optional[int] = None  # Set when linked to a stored near-duplicate's theme
+    run_original: Optional["RunOriginal"] = None  # What later near-duplicates in the run copy from this entry
+    duplicate_of: Optional["RunOriginal"] = None  # Near-duplicate from the same run
+
+
+@dataclass
+class RunOriginal:
+    """
+    The part of a run's entry that its later near-duplicates copy. The
+    near-duplicate filter remembers this for the whole run instead of the
+    entry, so the entry's content is freed once it is stored.
+    """
+    thesis_text: str = ""
+    thesis_embedding: Optional[np.ndarray] = None
+
 class FeedService:
     def __init__(self):
         self.nlp_service = NLPService()
-        self.theme_service = ThemeService()
+        self.theme_service = ThemeService(nlp_service=self.nlp_service)
+        self.fetcher = FeedFetcher()
+        self.cleaner = ContentCleaner()
+        self.dedup = NearDuplicateFilter() if settings.DEDUP_ENABLED else None
+        # Serializes the CPU/database stages when several runs overlap in one process
+        self.pipeline_lock = threading.Lock()
 
     def clean_content(self, content: str) -> str:
         """Clean HTML content and extract meaningful text."""
-        # Remove HTML tags
-        soup = BeautifulSoup(content, 'html.parser')
-        text = soup.get_text()
-        
-        # Remove URLs
-        text = re.sub(r'http\S+|www.\S+', '', text)
-        
-        # Remove extra whitespace and newlines
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove common HTML artifacts
-        text = text.replace('Read full article', '')
-        text = text.replace('Read more', '')
-        
-        return text.strip()
-
-    async def process_feed(self, feed_url: str) -> List[Dict]:
-        """Process a single RSS feed and return new posts."""
+        return clean_content(content)
+
+    @staticmethod
+    def entry_published_at(entry) -> Optional[datetime]:
+        """The entry's publish (or update) time, if the feed provides one."""
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        return datetime(*parsed[:6]) if parsed else None
+
+    def collect_entries(self, fetched: FetchResult, seen_urls: set, state: Optional[FeedState] = None) -> Tuple[List["PendingEntry"], int]:
+        """
+        Stage 1: parse a fetched feed and drop entries that are already stored.
+
+        Entries older than the feed's watermark (newest entry seen on a previous run) are
+        skipped without touching the database, and iteration stops at the watermark entry
+        itself when the feed lists entries newest first. The remaining URLs are checked against
+        stored posts with one query. Returns the new entries and the number skipped.
+        """
+        feed_url = fetched.feed_url
         logger.info(f"Starting to process feed: {feed_url}")
-        feed = feedparser.parse(feed_url)
-        new_posts = []
+        feed = feedparser.parse(fetched.content, response_headers={"content-location": feed_url})
+        watermark_id = state.last_entry_id if state else None
+        watermark_published_at = state.last_entry_published_at if state else None
+
+        published = [self.entry_published_at(entry) for entry in feed.entries]
+        dated = [p for p in published if p is not None]
+        newest_first = len(dated) == len(published) and all(a >= b for a, b in zip(dated, dated[1:]))
+
+        candidates = []
         skipped_posts = 0
-        processed_posts = 0
+        for index, (entry, published_at) in enumerate(zip(feed.entries, published)):
+            entry_id = entry.get('id') or entry.get('link')
+            if watermark_id is not None and entry_id == watermark_id:
+                if newest_first:
+                    # This entry and everything after it was seen on an earlier run
+                    skipped_posts += len(feed.entries) - index
+                    break
+                skipped_posts += 1
+                continue
+            if watermark_published_at is not None and published_at is not None and published_at < watermark_published_at:
+                skipped_posts += 1
+                continue
+            # Skip entries seen earlier in this run
+            if entry.link in seen_urls:
+                skipped_posts += 1
+                continue
+            seen_urls.add(entry.link)
+            candidates.append((entry, published_at))
 
-        for entry in feed.entries:
-            processed_posts += 1
-            # Check if post already exists
+        # Check the remaining candidates against stored posts with a single IN query
+        existing_urls = set()
+        if candidates:
             db = SessionLocal()
-            existing_post = db.query(Post).filter(Post.post_url == entry.link).first()
-            
-            if existing_post:
+            try:
+                existing_urls = {
+                    row.post_url
+                    for row in db.query(Post.post_url).filter(Post.post_url.in_([entry.link for entry, _ in candidates]))
+                }
+            finally:
                 db.close()
+
+        entries = []
+        for entry, published_at in candidates:
+            if entry.link in existing_urls:
                 skipped_posts += 1
                 continue
 
-            # Extract and clean content
+            # Extract raw content; it is cleaned by the next stage
             content = entry.get('content', [{'value': ''}])[0]['value'] if 'content' in entry else entry.get('summary', '')
-            cleaned_content = self.clean_content(content)
-            
-            # Extract thesis from cleaned content
-            thesis_text = self.nlp_service.extract_thesis(cleaned_content)
-            
-            # Skip if no meaningful thesis was extracted
-            if not thesis_text or len(thesis_text) < 20:  # Minimum length to ensure meaningful content
-                db.close()
-                skipped_posts += 1
-                continue
+            entries.append(PendingEntry(
+                feed_url=feed_url,
+                title=entry.title,
+                url=entry.link,
+                content=content,
+                published_at=published_at or datetime.utcnow()
+            ))
+
+        # Advance the watermark to the newest dated entry in this fetch
+        if dated:
+            newest = max(range(len(published)), key=lambda i: published[i] or datetime.min)
+            fetched.watermark_id = feed.entries[newest].get('id') or feed.entries[newest].get('link')
+            fetched.watermark_published_at = published[newest]
+        fetched.new_entries = len(entries)
+        fetched.publish_interval_seconds = estimate_publish_interval(published)
 
-            # Find or create theme
-            theme = self.theme_service.find_or_create_theme(thesis_text)
-            logger.info(f"Post '{entry.title}' assigned to theme: {theme.title} (ID: {theme.id})")
-
-            # Create post with all required fields
-            post = Post(
-                theme_id=theme.id,
-                thesis_text=thesis_text,
-                post_title=entry.title,
-                post_url=entry.link,
-                content=cleaned_content,
-                published_at=datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.utcnow(),
-                ingested_at=datetime.utcnow()
-            )
-
-            db.add(post)
-            db.commit()
-            db.refresh(post)
+        logger.info(f"Collected {len(entries)} new entries from {feed_url} (skipped {skipped_posts} already seen)")
+        return entries, skipped_posts
+
+    def encode_entries(self, entries: List["PendingEntry"]) -> None:
+        """
+        Stage 3: split every entry into sentences and encode all of them in one
+        batched encoder pass, then pick each entry's thesis and thesis embedding.
+        """
+        sentences = []
+        for entry in entries:
+            entry.sentences = self.nlp_service.split_sentences(entry.content)
+            sentences.extend(entry.sentences)
+
+        logger.info(f"Encoding {len(sentences)} sentences from {len(entries)} entries")
+        embeddings = self.nlp_service.encode(sentences)
+
+        offset = 0
+        for entry in entries:
+            count = len(entry.sentences)
+            if count:
+                entry_embeddings = embeddings[offset:offset + count]
+                best = self.nlp_service.select_thesis(entry_embeddings)
+                entry.thesis_text = entry.sentences[best]
+                # The thesis is one of the encoded sentences, so its vector is reused as-is
+                entry.thesis_embedding = entry_embeddings[best]
+            offset += count
+
+    def filter_duplicates(self, entries: List["PendingEntry"]) -> Tuple[List["PendingEntry"], List["PendingEntry"]]:
+        """
+        Fingerprint cleaned entries and split off near-duplicates of stored posts or of
+        earlier entries in this run. Duplicates of stored posts take that post's thesis,
+        embedding and theme; duplicates from this run are linked with `duplicate_of` to
+        the `RunOriginal` of their original, which is filled in once it is encoded.
+        Returns the entries that still need encoding and the duplicates.
+        """
+        if self.dedup is None:
+            return entries, []
+
+        for entry in entries:
+            entry.fingerprint = self.dedup.signature(entry.content)
+            entry.run_original = RunOriginal()
+
+        db = SessionLocal()
+        try:
+            matches = self.dedup.find_duplicates(db, [(entry.fingerprint, entry.run_original) for entry in entries])
+            stored_ids = [match.post_id for match in matches if match is not None and match.post_id is not None]
+            originals = {}
+            if stored_ids:
+                rows = (
+                    db.query(Post.id, Post.thesis_text, Post.theme_id, PostEmbedding.vector, PostEmbedding.dim, PostEmbedding.precision)
+                    .join(PostEmbedding, PostEmbedding.post_id == Post.id)
+                    .filter(Post.id.in_(stored_ids), PostEmbedding.model_name == self.nlp_service.model_name)
+                )
+                originals = {row.id: row for row in rows}
+        finally:
             db.close()
 
-            new_posts.append(post)
-            logger.info(f"Successfully processed post: {entry.title}")
+        unique, duplicates = [], []
+        for entry, match in zip(entries, matches):
+            if match is None:
+                unique.append(entry)
+            elif match.entry is not None:
+                entry.duplicate_of = match.entry
+                duplicates.append(entry)
+            elif match.post_id in originals:
+                original = originals[match.post_id]
+                entry.thesis_text = original.thesis_text
+                entry.thesis_embedding = embedding_from_bytes(original.vector, original.dim, original.precision)
+                entry.theme_id = original.theme_id
+                duplicates.append(entry)
+            else:
+                # The stored original has no usable embedding, so encode this entry after all
+                unique.append(entry)
+        self.dedup.avoided_encodes += len(duplicates)
+        return unique, duplicates
+
+    def dedup_counts(self) -> dict:
+        """The near-duplicate filter's counters for the current run."""
+        if self.dedup is None:
+            return {}
+        return {
+            "checked": self.dedup.checked,
+            "duplicates": self.dedup.duplicates,
+            "avoided_encodes": self.dedup.avoided_encodes
+        }
+
+    def encode_and_write(self, entries: List["PendingEntry"], writer: PostWriter,
+                         progress: Optional[IngestProgress] = None) -> int:
+        """
+        Encode a chunk of cleaned entries and queue them for storage. Near-duplicates
+        are not encoded: they are stored with their original's thesis, or skipped when
+        `DEDUP_ACTION` is "skip". Returns the number skipped.
+        """
+        if not entries:
+            return 0
+        progress = progress or IngestProgress()
+        with progress.stage("encode"):
+            dedup_counts = self.dedup_counts()
+            unique, duplicates = self.filter_duplicates(entries)
+            if dedup_counts:
+                progress.add(**{name: count - dedup_counts[name] for name, count in self.dedup_counts().items()})
+            self.encode_entries(unique)
+        for entry in unique:
+            if entry.run_original is not None:
+                entry.run_original.thesis_text = entry.thesis_text
+                entry.run_original.thesis_embedding = entry.thesis_embedding
+                entry.run_original = None
+        for entry in duplicates:
+            if entry.duplicate_of is not None:
+                entry.thesis_text = entry.duplicate_of.thesis_text
+                entry.thesis_embedding = entry.duplicate_of.thesis_embedding
+                entry.duplicate_of = None
+        skipped_posts = 0
+        if duplicates and settings.DEDUP_ACTION == "skip":
+            skipped_posts += len(duplicates)
+            entries = unique
+        written = len(writer.written)
+        with progress.stage("write"):
+            for entry in entries:
+                entry.sentences = []
+                # Skip if no meaningful thesis was extracted
+                if not entry.thesis_text or len(entry.thesis_text) < 20:  # Minimum length to ensure meaningful content
+                    skipped_posts += 1
+                    continue
+                writer.add(entry)
+        progress.add(encoded=len(unique), skipped=skipped_posts, new=len(writer.written) - written)
+        return skipped_posts
+
+    def run_pipeline(self, fetched: List[FetchResult], progress: Optional[IngestProgress] = None) -> Tuple[List[StoredPost], int, int, Set[str]]:
+        """
+        Run the CPU-bound stages over fetched feeds: collect, clean, encode in batches, then store.
+        Feeds are collected one at a time as the cleaner consumes their entries, and only
+        the ids and URLs of stored posts are kept. Per-feed results, counters and stage
+        timings are reported to `progress`. Returns the stored posts, the processed and
+        skipped entry counts, and the URLs of feeds that could not be parsed or had entries
+        that failed to store.
+        """
+        progress = progress or IngestProgress()
+        with self.pipeline_lock:
+            self.theme_service.sync_index()
+            if self.dedup is not None:
+                self.dedup.start_run()
+            seen_urls = set()
+            failed_feeds = set()
+            collected = {"processed": 0, "skipped": 0}
+            waiting, keys = {}, itertools.count()
+            states = self.fetcher.load_states([result.feed_url for result in fetched])
+
+            def collect():
+                # Stage 1 runs one feed at a time as the cleaner asks for more documents,
+                # so only the raw HTML of the feed being fed to it is held at once
+                for result in fetched:
+                    try:
+                        with progress.stage("collect"):
+                            feed_entries, feed_skipped = self.collect_entries(result, seen_urls, states.get(result.feed_url))
+                    except Exception as e:
+                        logger.error(f"Error processing feed {result.feed_url}: {str(e)}")
+                        progress.update_feed(result.feed_url, state="failed", error=str(e))
+                        failed_feeds.add(result.feed_url)
+                        continue
+                    collected["processed"] += len(feed_entries) + feed_skipped
+                    collected["skipped"] += feed_skipped
+                    progress.add(processed=len(feed_entries) + feed_skipped, skipped=feed_skipped)
+                    progress.update_feed(result.feed_url, state="collected", entries=len(feed_entries), skipped=feed_skipped)
+                    for entry in feed_entries:
+                        key = next(keys)
+                        waiting[key] = entry
+                        yield key, entry.content
 
-        logger.info(f"Feed processing complete for {feed_url}. Processed: {processed_posts}, New: {len(new_posts)}, Skipped: {skipped_posts}")
+            # Stage 2 streams cleaned entries into stage 3, which encodes them in chunks
+            writer = PostWriter(self.theme_service)
+            skipped_posts = 0
+            chunk = []
+            # The cleaner times only its own work: pulling the next document also runs collect()
+            for key, text in self.cleaner.clean_stream(collect(), timer=lambda: progress.stage("clean")):
+                entry = waiting.pop(key)
+                if text is None:
+                    # The cleaner could not handle this document; skip only this entry
+                    skipped_posts += 1
+                    progress.add(skipped=1)
+                    continue
+                entry.content = text
+                chunk.append(entry)
+                if len(chunk) >= settings.ENCODE_CHUNK_ENTRIES:
+                    skipped_posts += self.encode_and_write(chunk, writer, progress)
+                    chunk = []
+            skipped_posts += self.encode_and_write(chunk, writer, progress)
+            with progress.stage("write"):
+                written = len(writer.written)
+                writer.flush()
+            new_posts = writer.written
+            processed_posts = collected["processed"]
+            skipped_posts += collected["skipped"] + len(writer.failed)
+            progress.add(skipped=len(writer.failed), new=len(new_posts) - written)
+            failed_feeds |= {entry.feed_url for entry in writer.failed}
+
+            # Keep the old watermark for feeds with failed entries so they are retried next run
+            for result in fetched:
+                if result.feed_url in failed_feeds:
+                    result.watermark_id = result.watermark_published_at = None
+
+            stored = {}
+            for post in new_posts:
+                stored[post.feed_url] = stored.get(post.feed_url, 0) + 1
+            for result in fetched:
+                if progress.feeds.get(result.feed_url, {}).get("state") == "collected":
+                    progress.update_feed(result.feed_url, state="done", new=stored.get(result.feed_url, 0))
+
+            if self.dedup is not None:
+                logger.info(
+                    f"Near-duplicate filter checked {self.dedup.checked} entries: "
+                    f"{self.dedup.duplicates} near-duplicates, {self.dedup.avoided_encodes} article encodes avoided"
+                )
+
+            return new_posts, processed_posts, skipped_posts, failed_feeds
+
+    async def process_feeds(self, feed_urls: List[str], progress: Optional[IngestProgress] = None) -> List[StoredPost]:
+        """
+        Process several RSS feeds as one run. Feeds are downloaded concurrently;
+        unchanged feeds (HTTP 304) are skipped and the remaining stages run in a
+        worker thread so the event loop stays responsive.
+        """
+        progress = progress or IngestProgress()
+        with progress.stage("fetch"):
+            results = await self.fetcher.fetch_all(feed_urls)
+        for result in results:
+            if not result.ok:
+                progress.update_feed(result.feed_url, state="failed", http_status=result.status, error=result.error)
+            elif result.not_modified:
+                progress.update_feed(result.feed_url, state="not_modified", http_status=result.status)
+            else:
+                progress.update_feed(result.feed_url, state="fetched", http_status=result.status)
+        fetched = [result for result in results if result.ok and not result.not_modified]
+        not_modified = sum(1 for result in results if result.not_modified)
+        failed = sum(1 for result in results if not result.ok)
+        logger.info(f"Fetched {len(feed_urls)} feeds: {len(fetched)} changed, {not_modified} not modified, {failed} failed")
+
+        try:
+            new_posts, processed_posts, skipped_posts, failed_feeds = await asyncio.to_thread(self.run_pipeline, fetched, progress)
+        except Exception:
+            # Back off the fetched feeds instead of resubmitting them on every tick
+            for result in fetched:
+                result.watermark_id = result.watermark_published_at = None
+            self.fetcher.save_states(results, {result.feed_url for result in fetched})
+            raise
+        self.fetcher.save_states(results, failed_feeds)
+
+        logger.info(f"Feed processing complete for {len(feed_urls)} feeds. Processed: {processed_posts}, New: {len(new_posts)}, Skipped: {skipped_posts}")
         return new_posts
 
-    async def process_all_feeds(self) -> List[Dict]:
+    async def process_feed(self, feed_url: str) -> List[StoredPost]:
+        """Process a single RSS feed and return new posts."""
+        return await self.process_feeds([feed_url])
+
+    async def process_all_feeds(self) -> List[StoredPost]:
         """Process all configured RSS feeds."""
         logger.info(f"Starting to process all feeds. Total feeds: {len(settings.RSS_FEEDS)}")
-        all_new_posts = []
-        for feed_url in settings.RSS_FEEDS:
-            try:
-                new_posts = await self.process_feed(feed_url)
-                all_new_posts.extend(new_posts)
-            except Exception as e:
-                logger.error(f"Error processing feed {feed_url}: {str(e)}")
-        
+        all_new_posts = await self.process_feeds(settings.RSS_FEEDS)
         logger.info(f"Completed processing all feeds. Total new posts: {len(all_new_posts)}")
-        return all_new_posts 
\ No newline at end of file
+        return all_new_posts
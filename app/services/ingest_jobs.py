@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import json
+import uuid
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.feed_service import FeedService
+from app.services.ingest_progress import IngestProgress
+
+
+@dataclass
+class IngestJob:
+    """One ingest run started in the background."""
+    id: str
+    feed_urls: List[str]
+    status: str = "queued"
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    progress: IngestProgress = field(default_factory=IngestProgress)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "feed_urls": self.feed_urls,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            **self.progress.snapshot()
+        }
+
+
+class IngestJobManager:
+    """
+    Runs ingest jobs as tasks on the event loop and keeps the most recent
+    `INGEST_JOB_HISTORY` jobs for status queries.
+
+    Triggers are coalesced: a request for feeds that an unfinished job already
+    covers returns that job instead of starting a second crawl.
+    """
+
+    def __init__(self, feed_service: FeedService, history: int = None):
+        self.feed_service = feed_service
+        self.history = history or settings.INGEST_JOB_HISTORY
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+
+    def active_jobs(self) -> List[IngestJob]:
+        return [job for job in self._jobs.values() if not job.done]
+
+    def submit(self, feed_urls: List[str]) -> Tuple[IngestJob, bool]:
+        """
+        Start a job for `feed_urls`, or reuse an unfinished one covering all of them.
+        Must be called from the event loop. Returns the job and whether it was reused.
+        """
+        for job in self.active_jobs():
+            if set(feed_urls) <= set(job.feed_urls):
+                logger.info(f"Coalesced ingest trigger for {len(feed_urls)} feeds into running job {job.id}")
+                return job, True
+
+        job = IngestJob(id=uuid.uuid4().hex, feed_urls=list(feed_urls))
+        self._jobs[job.id] = job
+        self._prune()
+        job.task = asyncio.create_task(self._run(job))
+        logger.info(f"Started ingest job {job.id} for {len(feed_urls)} feeds")
+        return job, False
+
+    async def _run(self, job: IngestJob) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        status, error = "succeeded", None
+        try:
+            await self.feed_service.process_feeds(job.feed_urls, progress=job.progress)
+        except Exception as e:
+            status, error = "failed", str(e)
+            logger.error(f"Ingest job {job.id} failed: {str(e)}")
+        job.finished_at = datetime.utcnow()
+        job.error = error
+        # The status event is emitted before the job counts as done, so streams always see it
+        job.progress.event("status", status=status, error=error)
+        job.status = status
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond the history limit."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        while len(self._jobs) > self.history and finished:
+            del self._jobs[finished.pop(0)]
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        return list(reversed(self._jobs.values()))
+
+    async def stream(self, job: IngestJob) -> AsyncIterator[str]:
+        """
+        Yield the job's events as NDJSON lines, starting from the first, until it
+        finishes; the last line is the final job status.
+        """
+        seq = 0
+        while True:
+            done = job.done
+            for event in job.progress.events_since(seq):
+                seq = event["seq"] + 1
+                yield json.dumps(event) + "\n"
+            if done:
+                yield json.dumps({"type": "job", **job.to_dict()}) + "\n"
+                return
+            await asyncio.sleep(settings.INGEST_STREAM_POLL_SECONDS)
+
+
+feed_service = FeedService()
+job_manager = IngestJobManager(feed_service)
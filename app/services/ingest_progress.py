@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List
+import threading
+import time
+
+
+class IngestProgress:
+    """
+    Progress of one ingest run: per-feed state, running counters, time spent
+    per pipeline stage and an append-only event log for live updates.
+
+    Updated from the pipeline's worker thread and read from the event loop,
+    so all access goes through a lock.
+    """
+
+    def __init__(self):
+        self.feeds: Dict[str, dict] = {}
+        self.counters = {
+            "processed": 0, "skipped": 0, "new": 0, "encoded": 0,
+            "checked": 0, "duplicates": 0, "avoided_encodes": 0
+        }
+        self.stage_seconds: Dict[str, float] = {}
+        self.events: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _emit(self, event_type: str, **data) -> None:
+        self.events.append({"seq": len(self.events), "type": event_type, "at": datetime.utcnow().isoformat(), **data})
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + elapsed
+
+    def update_feed(self, feed_url: str, **fields) -> None:
+        """Merge `fields` into a feed's state and emit a feed event."""
+        with self._lock:
+            self.feeds.setdefault(feed_url, {}).update(fields)
+            self._emit("feed", feed_url=feed_url, **fields)
+
+    def add(self, **counts: int) -> None:
+        """Increment counters and emit a progress event."""
+        with self._lock:
+            for name, count in counts.items():
+                self.counters[name] = self.counters.get(name, 0) + count
+            self._emit("progress", **self.counters)
+
+    def event(self, event_type: str, **data) -> None:
+        """Emit an arbitrary event, e.g. a job status change."""
+        with self._lock:
+            self._emit(event_type, **data)
+
+    def events_since(self, seq: int) -> List[dict]:
+        with self._lock:
+            return self.events[seq:]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "feeds": {url: dict(state) for url, state in self.feeds.items()},
+                **self.counters,
+                "stage_seconds": {name: round(seconds, 3) for name, seconds in self.stage_seconds.items()}
+            }
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+import asyncio
+import os
+import socket
+import uuid
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models import Lease
+
+INGEST_LEASE = "ingest"
+
+
+class LeaderLease:
+    """
+    A named lease held by at most one worker, stored as a row in the `leases` table.
+
+    Acquiring and renewing are a single conditional UPDATE (take the row if we
+    already hold it or it has expired), so SQLite's write lock makes the
+    election atomic across processes. A holder that stops renewing, e.g.
+    because its process died, loses the lease once `ttl` seconds have passed.
+    """
+
+    def __init__(self, name: str, ttl: int = None):
+        self.name = name
+        self.ttl = ttl or settings.LEADER_LEASE_SECONDS
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.expires_at: Optional[datetime] = None
+
+    @property
+    def held(self) -> bool:
+        return self.expires_at is not None and datetime.utcnow() < self.expires_at
+
+    def try_acquire(self) -> bool:
+        """Acquire or renew the lease. Returns whether this worker holds it."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(Lease)
+                .where(Lease.name == self.name, or_(Lease.holder == self.holder, Lease.expires_at < now))
+                .values(
+                    holder=self.holder,
+                    acquired_at=case((Lease.holder == self.holder, Lease.acquired_at), else_=now),
+                    expires_at=expires_at
+                )
+            )
+            if result.rowcount == 0:
+                db.add(Lease(name=self.name, holder=self.holder, acquired_at=now, expires_at=expires_at))
+            db.commit()
+            self.expires_at = expires_at
+        except IntegrityError:
+            # The row exists and another worker holds an unexpired lease
+            db.rollback()
+            self.expires_at = None
+        except OperationalError as e:
+            # The database is busy; keep whatever we held until it actually expires
+            db.rollback()
+            logger.warning(f"Could not renew lease '{self.name}': {str(e)}")
+        finally:
+            db.close()
+        return self.held
+
+    def release(self) -> None:
+        """Give the lease up so another worker can take over without waiting for expiry."""
+        if self.expires_at is None:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Lease)
+                .where(Lease.name == self.name, Lease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            db.commit()
+        finally:
+            db.close()
+            self.expires_at = None
+
+
+class LeaderElection:
+    """
+    Keeps trying to acquire `lease` every `LEADER_RENEW_SECONDS` and calls
+    `on_elected` / `on_demoted` when this worker gains or loses it. The callbacks
+    run as separate tasks so slow startup work never delays lease renewal.
+    """
+
+    def __init__(self, lease: LeaderLease, on_elected: Callable[[], Awaitable[None]],
+                 on_demoted: Callable[[], Awaitable[None]]):
+        self.lease = lease
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._callback: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                held = await asyncio.to_thread(self.lease.try_acquire)
+                if held and not self.is_leader:
+                    self.is_leader = True
+                    logger.info(f"Worker {self.lease.holder} is now the ingest leader")
+                    self._callback = asyncio.create_task(self.on_elected())
+                elif not held and self.is_leader:
+                    self.is_leader = False
+                    logger.warning(f"Worker {self.lease.holder} lost the ingest lease")
+                    self._callback = asyncio.create_task(self.on_demoted())
+            except Exception as e:
+                logger.error(f"Leader election error: {str(e)}")
+            await asyncio.sleep(settings.LEADER_RENEW_SECONDS)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.is_leader:
+            await asyncio.to_thread(self.lease.release)
+            self.is_leader = False
+
+
+ingest_lease = LeaderLease(INGEST_LEASE)
+
+
+def is_ingest_leader() -> bool:
+    """Whether this worker may run ingestion: always without leader election, else only while holding the lease."""
+    return not settings.LEADER_ELECTION or ingest_lease.held
@@ -0,0 +1,62 @@
+from typing import Dict, List
+from datetime import datetime
+import threading
+import time
+from sentence_transformers import SentenceTransformer
+from app.core.logging import logger
+
+_models: Dict[str, SentenceTransformer] = {}
+_model_info: Dict[str, dict] = {}
+_registry_lock = threading.Lock()
+_load_locks: Dict[str, threading.Lock] = {}
+
+
+def get_model(model_name: str) -> SentenceTransformer:
+    """
+    Return the shared instance of a sentence transformer model, loading it on first use.
+    Concurrent first calls for the same model wait for a single load.
+    """
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        load_lock = _load_locks.setdefault(model_name, threading.Lock())
+
+    with load_lock:
+        model = _models.get(model_name)
+        if model is None:
+            logger.info(f"Loading sentence transformer model: {model_name}")
+            started = time.perf_counter()
+            model = SentenceTransformer(model_name)
+            load_seconds = time.perf_counter() - started
+            _model_info[model_name] = {
+                "loaded_at": datetime.utcnow().isoformat(),
+                "load_seconds": round(load_seconds, 3)
+            }
+            _models[model_name] = model
+            logger.info(f"Loaded model {model_name} in {load_seconds:.2f}s")
+    return model
+
+
+def _memory_footprint(model: SentenceTransformer) -> Dict[str, int]:
+    """Count parameters and the bytes held by parameters and buffers."""
+    parameters = list(model.parameters())
+    parameter_bytes = sum(p.numel() * p.element_size() for p in parameters)
+    buffer_bytes = sum(b.numel() * b.element_size() for b in model.buffers()) if hasattr(model, "buffers") else 0
+    return {
+        "parameters": sum(p.numel() for p in parameters),
+        "memory_bytes": parameter_bytes + buffer_bytes
+    }
+
+
+def loaded_models() -> List[dict]:
+    """Describe every model loaded in this process, including its memory footprint."""
+    models = []
+    for model_name, model in list(_models.items()):
+        info = {"model_name": model_name, "device": str(getattr(model, "device", "cpu"))}
+        info.update(_model_info.get(model_name, {}))
+        info.update(_memory_footprint(model))
+        info["memory_mb"] = round(info["memory_bytes"] / (1024 * 1024), 1)
+        models.append(info)
+    return models
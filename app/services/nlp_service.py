@@ -1,11 +1,38 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, Optional
 import numpy as np
 from app.core.config import settings
+from app.services.embeddings import normalize_embeddings
+from app.services.segmenter import split_sentences, select_within_budget
+from app.services.model_registry import get_model
+from app.services.embedding_cache import EmbeddingCache, cache_key, embedding_cache
 
 class NLPService:
-    def __init__(self):
-        self.model = SentenceTransformer(settings.MODEL_NAME)
+    def __init__(self, model_name: Optional[str] = None, cache: Optional[EmbeddingCache] = None):
+        self.model_name = model_name or settings.MODEL_NAME
+        self.cache = cache if cache is not None else embedding_cache
+
+    @property
+    def model(self):
+        """The shared model instance, loaded on first use (see `model_registry`)."""
+        return get_model(self.model_name)
+
+    def split_sentences(self, text: str) -> List[str]:
+        """
+        Split text into candidate thesis sentences, capped per article by
+        `MAX_SENTENCES_PER_ARTICLE` and `MAX_TOKENS_PER_ARTICLE`.
+        """
+        sentences = [s for s in split_sentences(text) if len(s) > 20]  # Filter short sentences
+        return select_within_budget(sentences, settings.MAX_SENTENCES_PER_ARTICLE, settings.MAX_TOKENS_PER_ARTICLE)
+
+    def select_thesis(self, embeddings: np.ndarray) -> int:
+        """
+        Return the index of the most central sentence, given the article's sentence embeddings.
+        A sentence's mean cosine similarity to all sentences equals its dot product with the
+        mean of the normalized embeddings, so scoring is a single matrix-vector product.
+        """
+        embeddings = normalize_embeddings(embeddings)
+        scores = embeddings @ embeddings.mean(axis=0)
+        return int(np.argmax(scores))
 
     def extract_thesis(self, text: str) -> str:
         """
@@ -13,33 +40,44 @@ class NLPService:
         This is a simplified version - you might want to use more sophisticated
         NLP techniques for better thesis extraction.
         """
-        # Split text into sentences
-        sentences = text.split('.')
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 20]  # Filter short sentences
+        sentences = self.split_sentences(text)
 
         if not sentences:
             return ""
 
-        # Get embeddings for all sentences
-        embeddings = self.model.encode(sentences)
+        # Return the sentence with the highest score
+        return sentences[self.select_thesis(self.encode(sentences))]
 
-        # Calculate sentence importance scores (using mean of cosine similarities)
-        scores = []
-        for i, emb in enumerate(embeddings):
-            similarities = np.dot(embeddings, emb) / (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(emb))
-            scores.append(np.mean(similarities))
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Encode texts into L2-normalized float32 embeddings, one row per text.
+        Texts already in the embedding cache are not re-encoded; the rest (deduplicated)
+        go through a single encoder call, batched by `batch_size` (defaults to `ENCODE_BATCH_SIZE`).
+        """
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
 
-        # Return the sentence with the highest score
-        best_sentence_idx = np.argmax(scores)
-        return sentences[best_sentence_idx]
+        keys = [cache_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            encoded = normalize_embeddings(self.model.encode(
+                list(missing.values()), batch_size=batch_size or settings.ENCODE_BATCH_SIZE
+            ))
+            new_entries = {key: row.copy() for key, row in zip(missing.keys(), encoded)}
+            self.cache.put_many(new_entries)
+            cached.update(new_entries)
+
+        return np.vstack([cached[key] for key in keys])
 
     def calculate_similarity(self, thesis1: str, thesis2: str) -> float:
         """Calculate similarity between two thesis statements."""
         if not thesis1 or not thesis2:
             return 0.0
 
-        emb1 = self.model.encode([thesis1])[0]
-        emb2 = self.model.encode([thesis2])[0]
-
-        similarity = np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
-        return float(similarity) 
\ No newline at end of file
+        emb1, emb2 = self.encode([thesis1, thesis2])
+        return float(np.dot(emb1, emb2))
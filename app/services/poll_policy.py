@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+import random
+from app.core.config import settings
+
+RECENT_ENTRIES = 20  # Newest entries used to estimate a feed's publish interval
+PUBLISH_INTERVAL_SMOOTHING = 0.3  # Weight of the newest estimate in the moving average
+SLOWDOWN_FACTOR = 1.5  # Interval growth after a poll that found nothing new
+
+
+def estimate_publish_interval(published: List[Optional[datetime]]) -> Optional[float]:
+    """Median gap in seconds between the feed's newest distinct publish times, if there are enough."""
+    times = sorted({p for p in published if p is not None}, reverse=True)[:RECENT_ENTRIES]
+    if len(times) < 2:
+        return None
+    gaps = sorted((a - b).total_seconds() for a, b in zip(times, times[1:]))
+    return gaps[len(gaps) // 2]
+
+
+def clamp_interval(seconds: float) -> float:
+    return min(max(seconds, settings.FEED_POLL_MIN_SECONDS), settings.FEED_POLL_MAX_SECONDS)
+
+
+def schedule_next_poll(state, ok: bool, new_entries: int, publish_interval: Optional[float],
+                       now: Optional[datetime] = None) -> None:
+    """
+    Update a `FeedState`'s polling interval after a fetch and set its next poll time.
+
+    Feeds that produced new entries are polled at about half their observed publish
+    interval; every poll that finds nothing new (including 304 responses) stretches
+    the interval by `SLOWDOWN_FACTOR`, so dead feeds drift to `FEED_POLL_MAX_SECONDS`.
+    Failures keep the interval but back off exponentially on top of it. The next
+    poll time is jittered by `FEED_POLL_JITTER` to spread requests out.
+    """
+    now = now or datetime.utcnow()
+    interval = state.poll_interval_seconds or settings.SCHEDULE_INTERVAL_MINUTES * 60
+
+    if not ok:
+        state.consecutive_failures = (state.consecutive_failures or 0) + 1
+        delay = min(interval * 2 ** state.consecutive_failures, settings.FEED_POLL_MAX_BACKOFF_SECONDS)
+    else:
+        state.consecutive_failures = 0
+        if publish_interval is not None:
+            state.publish_interval_seconds = publish_interval if state.publish_interval_seconds is None else (
+                PUBLISH_INTERVAL_SMOOTHING * publish_interval
+                + (1 - PUBLISH_INTERVAL_SMOOTHING) * state.publish_interval_seconds
+            )
+        if new_entries > 0:
+            target = state.publish_interval_seconds / 2 if state.publish_interval_seconds else interval / 2
+            interval = clamp_interval(min(interval, target))
+        else:
+            interval = clamp_interval(interval * SLOWDOWN_FACTOR)
+        state.poll_interval_seconds = interval
+        delay = interval
+
+    jitter = settings.FEED_POLL_JITTER
+    state.next_poll_at = now + timedelta(seconds=delay * random.uniform(1 - jitter, 1 + jitter))
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+from sqlalchemy import insert
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models import Post, PostEmbedding, PostFingerprint, PostFingerprintBand, Theme
+from app.services.data_version import bump_data_version
+from app.services.dedup import fingerprint_rows
+from app.services.embeddings import embedding_to_bytes
+
+
+@dataclass
+class StoredPost:
+    """A post written by `PostWriter`; its content is not kept once it is stored."""
+    id: int
+    post_url: str
+    feed_url: str
+
+
+class PostWriter:
+    """
+    Buffers new posts and writes them in batches, one transaction per batch.
+
+    Theme assignment, centroid sums, posts and their embeddings for a whole
+    batch share a single commit; posts and embeddings go through SQLAlchemy's
+    bulk INSERT path. If a batch fails it is rolled back and retried one entry
+    per transaction, so a single bad entry does not lose the rest.
+    """
+
+    def __init__(self, theme_service, batch_size: int = None):
+        self.theme_service = theme_service
+        self.batch_size = batch_size or settings.INGEST_WRITE_BATCH_SIZE
+        self.pending = []
+        self.written: List[StoredPost] = []
+        self.failed = []
+
+    def add(self, entry) -> None:
+        """Queue an encoded entry, flushing once the batch is full."""
+        self.pending.append(entry)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all queued entries."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            self.written.extend(self._write_batch(batch))
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} posts failed, retrying row by row: {str(e)}")
+            for entry in batch:
+                try:
+                    self.written.extend(self._write_batch([entry]))
+                except Exception as e:
+                    self.failed.append(entry)
+                    logger.error(f"Error storing post {entry.url}: {str(e)}")
+
+    def _write_batch(self, entries) -> List[StoredPost]:
+        db = SessionLocal()
+        try:
+            theme_ids, handles = [], []
+            for entry in entries:
+                theme = None
+                if entry.theme_id is not None:
+                    # Near-duplicates of a stored post join that post's theme, unless it has since been compacted away
+                    theme = db.get(Theme, entry.theme_id)
+                if theme is None:
+                    theme = self.theme_service.assign_theme(db, entry.thesis_text, embedding=entry.thesis_embedding)
+                self.theme_service.accumulate_theme_embedding(db, theme.id, entry.thesis_embedding)
+                # Later entries in the batch must see this one when they are matched
+                handles.append(self.theme_service.register_post(None, theme.id, entry.thesis_embedding, entry.published_at))
+                theme_ids.append(theme.id)
+                logger.info(f"Post '{entry.title}' assigned to theme: {theme.title} (ID: {theme.id})")
+
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "theme_id": theme_id,
+                    "thesis_text": entry.thesis_text,
+                    "post_title": entry.title,
+                    "post_url": entry.url,
+                    "content": entry.content,
+                    "published_at": entry.published_at,
+                    "ingested_at": now,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for entry, theme_id in zip(entries, theme_ids)
+            ]
+            post_ids = db.execute(
+                insert(Post).returning(Post.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            db.execute(insert(PostEmbedding), [
+                {
+                    "post_id": post_id,
+                    "model_name": settings.MODEL_NAME,
+                    "dim": int(entry.thesis_embedding.shape[0]),
+                    "vector": embedding_to_bytes(entry.thesis_embedding),
+                    "precision": settings.EMBEDDING_PRECISION,
+                    "created_at": now
+                }
+                for post_id, entry in zip(post_ids, entries)
+            ])
+            fingerprints, bands = [], []
+            for post_id, entry in zip(post_ids, entries):
+                if entry.fingerprint is not None:
+                    fingerprint, fingerprint_bands = fingerprint_rows(post_id, entry.fingerprint, settings.DEDUP_BANDS)
+                    fingerprints.append(dict(fingerprint, created_at=now))
+                    bands.extend(fingerprint_bands)
+            if fingerprints:
+                db.execute(insert(PostFingerprint), fingerprints)
+                db.execute(insert(PostFingerprintBand), bands)
+            # Committed with the batch, so cached theme responses expire exactly when it lands
+            bump_data_version(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # The batch's posts were rolled back; take their rows out of the in-memory index again
+            self.theme_service.discard_posts(handles)
+            raise
+        finally:
+            db.close()
+
+        self.theme_service.bind_post_ids(handles, post_ids)
+        logger.info(f"Stored batch of {len(entries)} posts")
+        return [StoredPost(id=post_id, post_url=entry.url, feed_url=entry.feed_url) for post_id, entry in zip(post_ids, entries)]
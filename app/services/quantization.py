@@ -0,0 +1,80 @@
+from typing import Optional, Tuple
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+SCALE_DTYPE = np.float32
+_STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+_INT8_MAX = 127
+_SCAN_BLOCK_ROWS = 65536  # Rows widened to float32 at once by `scan_dot`
+
+
+def storage_dtype(precision: str):
+    """NumPy dtype used to hold vectors stored at `precision`."""
+    if precision not in _STORAGE_DTYPES:
+        raise ValueError(f"Unknown embedding precision: {precision}")
+    return _STORAGE_DTYPES[precision]
+
+
+def quantize(embeddings: np.ndarray, precision: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert float row vectors to `precision`. Returns the codes and one scale
+    factor per row; `codes * scale` approximates the input. int8 maps each
+    row's largest magnitude to 127, the float precisions have a scale of 1.
+    """
+    embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    if precision == "int8":
+        scales = np.abs(embeddings).max(axis=1) / _INT8_MAX
+        scales[scales == 0] = 1.0
+        codes = np.rint(embeddings / scales[:, np.newaxis]).astype(np.int8)
+        return codes, scales.astype(SCALE_DTYPE)
+    return embeddings.astype(storage_dtype(precision)), np.ones(len(embeddings), dtype=SCALE_DTYPE)
+
+
+def dequantize(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """float32 row vectors from codes and their per-row scales."""
+    vectors = np.atleast_2d(codes).astype(np.float32)
+    if codes.dtype == np.int8:
+        vectors *= np.asarray(scales, dtype=np.float32)[:, np.newaxis]
+    return vectors
+
+
+def scan_dot(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Dot product of a float32 query with every stored row.
+
+    float32 rows go straight to BLAS. Reduced-precision rows are widened to
+    float32 in blocks of `_SCAN_BLOCK_ROWS`, so the temporary copy stays
+    small while the resident matrix keeps its compact dtype; int8 results are
+    multiplied by the row scales afterwards.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if codes.dtype == np.float32:
+        return codes @ query
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), _SCAN_BLOCK_ROWS):
+        scores[start:start + _SCAN_BLOCK_ROWS] = codes[start:start + _SCAN_BLOCK_ROWS].astype(np.float32) @ query
+    if codes.dtype == np.int8:
+        scores *= scales
+    return scores
+
+
+def vector_to_bytes(embedding: np.ndarray, precision: str) -> bytes:
+    """Serialize one vector at `precision`; int8 vectors are prefixed with their float32 scale."""
+    codes, scales = quantize(embedding, precision)
+    if precision == "int8":
+        return scales[:1].tobytes() + codes[0].tobytes()
+    return codes[0].tobytes()
+
+
+def vector_from_bytes(data: bytes, precision: str, dim: Optional[int] = None) -> np.ndarray:
+    """Deserialize a vector written by `vector_to_bytes` as float32."""
+    if precision == "int8":
+        scale = np.frombuffer(data, dtype=SCALE_DTYPE, count=1)
+        vector = np.frombuffer(data, dtype=np.int8, offset=SCALE_DTYPE().itemsize).astype(np.float32) * scale[0]
+    else:
+        vector = np.frombuffer(data, dtype=storage_dtype(precision))
+        if vector.dtype != np.float32:
+            vector = vector.astype(np.float32)
+    if dim is not None and vector.shape[0] != dim:
+        raise ValueError(f"Stored embedding has {vector.shape[0]} dimensions, expected {dim}")
+    return vector
@@ -0,0 +1,237 @@
+from typing import Iterator, Optional, Tuple
+import time
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sqlalchemy import exists, func, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models import Post, PostEmbedding, Theme
+from app.services.data_version import bump_data_version, bump_theme_layout_version
+from app.services.embeddings import CENTROID_SUM_DTYPE, centroid_sum_to_bytes, embedding_from_bytes, normalize_embeddings
+
+_SCORE_BLOCK = 1 << 24  # Similarity scores computed at once (64 MiB of float32)
+_WRITE_CHUNK = 10000
+
+
+def iter_post_embeddings(db: Session, batch_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield (post ids, theme ids, embeddings) chunks of the posts embedded with `MODEL_NAME`, in id order."""
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Post.id, Post.theme_id, PostEmbedding.vector, PostEmbedding.dim, PostEmbedding.precision)
+            .join(PostEmbedding, PostEmbedding.post_id == Post.id)
+            .filter(Post.id > last_id, PostEmbedding.model_name == settings.MODEL_NAME)
+            .order_by(Post.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return
+        post_ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+        theme_ids = np.fromiter((row.theme_id if row.theme_id is not None else -1 for row in rows), dtype=np.int64, count=len(rows))
+        embeddings = np.vstack([embedding_from_bytes(row.vector, row.dim, row.precision) for row in rows])
+        yield post_ids, theme_ids, embeddings
+        last_id = int(post_ids[-1])
+
+
+def nearest_centroids(embeddings: np.ndarray, centroids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index of and cosine similarity to each row's nearest centroid, scored in bounded blocks."""
+    rows = max(1, _SCORE_BLOCK // max(1, len(centroids)))
+    labels = np.empty(len(embeddings), dtype=np.int64)
+    scores = np.empty(len(embeddings), dtype=np.float32)
+    for start in range(0, len(embeddings), rows):
+        block = embeddings[start:start + rows] @ centroids.T
+        labels[start:start + rows] = block.argmax(axis=1)
+        scores[start:start + rows] = block[np.arange(len(block)), labels[start:start + rows]]
+    return labels, scores
+
+
+def merge_close_centroids(centroids: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Union centroids whose cosine similarity is at least `threshold`.
+    Returns, for each centroid, the index of the group it belongs to (0..groups-1).
+    """
+    parent = np.arange(len(centroids))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = max(1, _SCORE_BLOCK // max(1, len(centroids)))
+    for start in range(0, len(centroids), rows):
+        block = centroids[start:start + rows] @ centroids.T
+        for i, j in zip(*np.nonzero(block >= threshold)):
+            a, b = find(start + i), find(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    roots = np.array([find(i) for i in range(len(centroids))])
+    _, groups = np.unique(roots, return_inverse=True)
+    return groups
+
+
+def match_clusters_to_themes(labels: np.ndarray, old_theme_ids: np.ndarray, n_clusters: int) -> np.ndarray:
+    """
+    Reuse existing themes for the new clusters to keep theme ids stable: pairs are
+    taken greedily by the number of posts they share. Returns the theme id for each
+    cluster, or -1 where a new theme has to be created.
+    """
+    pairs, counts = np.unique(np.stack([labels, old_theme_ids]), axis=1, return_counts=True)
+    theme_for_cluster = np.full(n_clusters, -1, dtype=np.int64)
+    used_themes = set()
+    for index in np.argsort(-counts, kind="stable"):
+        cluster, theme_id = int(pairs[0, index]), int(pairs[1, index])
+        if theme_id < 0 or theme_for_cluster[cluster] >= 0 or theme_id in used_themes:
+            continue
+        theme_for_cluster[cluster] = theme_id
+        used_themes.add(theme_id)
+    return theme_for_cluster
+
+
+def recluster_themes(n_clusters: Optional[int] = None, merge_threshold: Optional[float] = None,
+                     batch_size: Optional[int] = None, dry_run: bool = False, seed: int = 0) -> dict:
+    """
+    Re-cluster every stored thesis embedding and rewrite the themes to match.
+
+    Embeddings are streamed from the database in chunks of `batch_size` to fit a
+    mini-batch k-means model, then streamed again to assign each post to its nearest
+    centroid; clusters whose centroids are at least `merge_threshold` similar are
+    joined. Only ids, labels and per-cluster sums are held in memory. Existing themes
+    are reused for the clusters they overlap most, and the post moves, new themes,
+    centroid sums and deletions of emptied themes are written in one transaction.
+    Posts without an embedding for the current model keep their theme.
+
+    Returns a report of the changes and time spent per phase; with `dry_run`
+    nothing is written.
+    """
+    from app.services.theme_service import ThemeService
+
+    batch_size = batch_size or settings.RECLUSTER_BATCH_SIZE
+    if merge_threshold is None:
+        merge_threshold = settings.RECLUSTER_MERGE_THRESHOLD
+    started = time.perf_counter()
+    timings = {}
+    db = SessionLocal()
+    try:
+        total = db.query(func.count(PostEmbedding.post_id)).filter(PostEmbedding.model_name == settings.MODEL_NAME).scalar()
+        themes_before = db.query(func.count(Theme.id)).scalar()
+        report = {"posts": total, "themes_before": themes_before, "dry_run": dry_run}
+        if not total:
+            logger.info("No embedded posts to re-cluster")
+            return {**report, "themes_after": themes_before, "seconds": {}}
+
+        k = max(1, min(n_clusters or settings.RECLUSTER_N_CLUSTERS or themes_before or 1, total))
+        chunk = max(batch_size, k)  # The first partial_fit initializes k centroids from one chunk
+
+        # Pass 1: fit the centroids on streamed chunks
+        phase = time.perf_counter()
+        kmeans = MiniBatchKMeans(n_clusters=k, random_state=seed, n_init=1)
+        for _ in range(settings.RECLUSTER_EPOCHS):
+            for _, _, embeddings in iter_post_embeddings(db, chunk):
+                if not hasattr(kmeans, "cluster_centers_") and len(embeddings) < k:
+                    continue
+                kmeans.partial_fit(embeddings)
+        if not hasattr(kmeans, "cluster_centers_"):
+            # Every chunk was smaller than k: fewer posts than clusters were requested
+            k = max(1, min(k, total))
+            kmeans = MiniBatchKMeans(n_clusters=k, random_state=seed, n_init=1)
+            kmeans.partial_fit(np.vstack([embeddings for _, _, embeddings in iter_post_embeddings(db, chunk)]))
+        centroids = normalize_embeddings(kmeans.cluster_centers_)
+        groups = merge_close_centroids(centroids, merge_threshold)
+        n_groups = int(groups.max()) + 1
+        timings["fit"] = time.perf_counter() - phase
+
+        # Pass 2: assign posts, accumulate per-cluster sums and pick each cluster's most central post
+        phase = time.perf_counter()
+        post_ids = np.empty(total, dtype=np.int64)
+        old_theme_ids = np.empty(total, dtype=np.int64)
+        labels = np.empty(total, dtype=np.int64)
+        sums = np.zeros((n_groups, centroids.shape[1]), dtype=CENTROID_SUM_DTYPE)
+        best_score = np.full(n_groups, -np.inf, dtype=np.float32)
+        best_post = np.full(n_groups, -1, dtype=np.int64)
+        outliers = 0
+        offset = 0
+        for chunk_post_ids, chunk_theme_ids, embeddings in iter_post_embeddings(db, chunk):
+            nearest, scores = nearest_centroids(embeddings, centroids)
+            chunk_labels = groups[nearest]
+            end = offset + len(chunk_post_ids)
+            post_ids[offset:end] = chunk_post_ids
+            old_theme_ids[offset:end] = chunk_theme_ids
+            labels[offset:end] = chunk_labels
+            offset = end
+            np.add.at(sums, chunk_labels, embeddings)
+            outliers += int((scores < settings.SIMILARITY_THRESHOLD).sum())
+
+            order = np.lexsort((-scores, chunk_labels))
+            clusters, first = np.unique(chunk_labels[order], return_index=True)
+            candidates = order[first]
+            better = scores[candidates] > best_score[clusters]
+            best_score[clusters[better]] = scores[candidates[better]]
+            best_post[clusters[better]] = chunk_post_ids[candidates[better]]
+        # Posts embedded after the count was taken are left for the next run
+        post_ids, old_theme_ids, labels = post_ids[:offset], old_theme_ids[:offset], labels[:offset]
+        counts = np.bincount(labels, minlength=n_groups)
+
+        theme_for_cluster = match_clusters_to_themes(labels, old_theme_ids, n_groups)
+        new_clusters = np.nonzero((theme_for_cluster < 0) & (counts > 0))[0]
+        timings["assign"] = time.perf_counter() - phase
+
+        # Write: new themes, post moves, centroid sums and emptied themes in one transaction
+        phase = time.perf_counter()
+        theme_service = ThemeService()
+        titles = {}
+        representative_ids = [int(best_post[cluster]) for cluster in new_clusters]
+        for start in range(0, len(representative_ids), _WRITE_CHUNK):
+            rows = db.query(Post.id, Post.thesis_text).filter(Post.id.in_(representative_ids[start:start + _WRITE_CHUNK]))
+            titles.update({row.id: theme_service.clean_title(row.thesis_text) for row in rows})
+        new_themes = [Theme(title=titles.get(int(best_post[cluster]), "")) for cluster in new_clusters]
+        if not dry_run:
+            db.add_all(new_themes)
+            db.flush()
+            for cluster, theme in zip(new_clusters, new_themes):
+                theme_for_cluster[cluster] = theme.id
+
+        new_theme_ids = theme_for_cluster[labels]
+        moved = np.nonzero(new_theme_ids != old_theme_ids)[0]
+        themes_deleted = 0
+        if not dry_run:
+            for start in range(0, len(moved), _WRITE_CHUNK):
+                index = moved[start:start + _WRITE_CHUNK]
+                db.execute(update(Post), [
+                    {"id": int(post_id), "theme_id": int(theme_id)}
+                    for post_id, theme_id in zip(post_ids[index], new_theme_ids[index])
+                ])
+            db.execute(update(Theme), [
+                {"id": int(theme_for_cluster[cluster]), "embedding_sum": centroid_sum_to_bytes(sums[cluster]),
+                 "embedding_count": int(counts[cluster])}
+                for cluster in np.nonzero(counts > 0)[0]
+            ])
+            themes_deleted = db.query(Theme).filter(~exists().where(Post.theme_id == Theme.id)).delete(synchronize_session=False)
+            bump_data_version(db)
+            bump_theme_layout_version(db)
+            db.commit()
+        timings["write"] = time.perf_counter() - phase
+        timings["total"] = time.perf_counter() - started
+
+        report.update({
+            "clusters": k,
+            "clusters_after_merge": int((counts > 0).sum()),
+            "themes_created": len(new_clusters),
+            "themes_kept": int(((theme_for_cluster >= 0) & (counts > 0)).sum()) - (0 if dry_run else len(new_clusters)),
+            "themes_deleted": themes_deleted,
+            "themes_after": themes_before if dry_run else db.query(func.count(Theme.id)).scalar(),
+            "posts_moved": int(len(moved)),
+            "outliers": outliers,
+            "seconds": {name: round(seconds, 3) for name, seconds in timings.items()}
+        })
+        logger.info(f"Re-clustering {'dry run ' if dry_run else ''}complete: {report}")
+        return report
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
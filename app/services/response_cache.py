@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+import hashlib
+import json
+import threading
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from app.core.config import settings
+from app.services.data_version import get_data_version
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    """
+    Bounded LRU of serialized JSON responses for one data version.
+
+    Entries are keyed by request path and query string. When the data version
+    changes every entry is dropped at once, so a response is never served
+    after the data it was built from has changed.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version: Optional[int] = None
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: int, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self._bytes = 0
+                self.version = version
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, version: int, key: str, body: bytes) -> CachedResponse:
+        entry = CachedResponse(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+        with self._lock:
+            if version != self.version or len(body) > self.max_bytes:
+                return entry
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+        return entry
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_SIZE,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES
+)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so a W/ prefix on the client's tag is ignored
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def cached_json_response(request: Request, build: Callable[[], Any]) -> Optional[Response]:
+    """
+    Serve a JSON response from the cache for the current data version, building it
+    with `build` on a miss. Responses carry a strong ETag, and a matching
+    If-None-Match gets an empty 304. Returns None (uncached) when `build` returns None.
+    """
+    version = get_data_version()
+    key = f"{request.url.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.query_params.multi_items()))}"
+    entry = response_cache.get(version, key)
+    if entry is None:
+        data = build()
+        if data is None:
+            return None
+        body = json.dumps(jsonable_encoder(data), separators=(",", ":")).encode("utf-8")
+        entry = response_cache.put(version, key, body)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
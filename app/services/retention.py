@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from typing import Optional
+import gzip
+import json
+import os
+from sqlalchemy import update
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models import Post
+
+
+def prune_post_content(days: Optional[int] = None, archive_dir: Optional[str] = None, batch_size: int = 1000) -> int:
+    """
+    Drop the article content of posts published more than `days` days ago
+    (`CONTENT_RETENTION_DAYS`), keeping the thesis, title, URL and theme. With
+    `archive_dir` (`CONTENT_ARCHIVE_DIR`) the content is first appended to a
+    gzipped JSON lines file there. Returns the number of posts pruned.
+
+    SQLite reuses the freed pages for new rows; run VACUUM to shrink the file.
+    """
+    days = settings.CONTENT_RETENTION_DAYS if days is None else days
+    archive_dir = settings.CONTENT_ARCHIVE_DIR if archive_dir is None else archive_dir
+    if days <= 0:
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archive = None
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(archive_dir, f"content-{datetime.utcnow():%Y%m%dT%H%M%S}.jsonl.gz")
+        archive = gzip.open(archive_path, "at", encoding="utf-8")
+
+    db = SessionLocal()
+    total = 0
+    last_id = 0
+    try:
+        while True:
+            rows = (
+                db.query(Post.id, Post.post_url, Post.published_at, Post.content)
+                .filter(Post.id > last_id, Post.published_at < cutoff, Post.content.isnot(None))
+                .order_by(Post.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            if archive is not None:
+                for row in rows:
+                    archive.write(json.dumps({
+                        "id": row.id,
+                        "url": row.post_url,
+                        "published_at": row.published_at.isoformat(),
+                        "content": row.content
+                    }) + "\n")
+                archive.flush()
+            post_ids = [row.id for row in rows]
+            db.execute(update(Post).where(Post.id.in_(post_ids)).values(content=None))
+            db.commit()
+
+            total += len(rows)
+            last_id = post_ids[-1]
+            logger.info(f"Pruned content of {total} posts (last post ID: {last_id})")
+    finally:
+        db.close()
+        if archive is not None:
+            archive.close()
+
+    logger.info(f"Content retention complete. Posts pruned: {total} (published before {cutoff.isoformat()})")
+    return total
@@ -1,20 +1,82 @@
-from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime
+from typing import List
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from app.services.feed_service import FeedService
+from app.db.session import SessionLocal
+from app.models import FeedState
+from app.services.ingest_jobs import feed_service, job_manager
+from app.services.retention import prune_post_content
+from app.services.theme_compaction import compact_themes
 from app.core.config import settings
+from app.core.logging import logger
 
-scheduler = BackgroundScheduler()
-feed_service = FeedService()
+# Runs on the application's event loop, so scheduled ingests share it with API-triggered jobs
+scheduler = AsyncIOScheduler()
 
-def process_feeds_job():
-    """Job to process all RSS feeds."""
-    feed_service.process_all_feeds()
+def due_feeds(feed_urls: List[str], now: datetime = None) -> List[str]:
+    """Configured feeds whose next poll time has passed (or that were never polled), most overdue first."""
+    now = now or datetime.utcnow()
+    db = SessionLocal()
+    try:
+        states = {
+            state.feed_url: state.next_poll_at
+            for state in db.query(FeedState.feed_url, FeedState.next_poll_at).filter(FeedState.feed_url.in_(feed_urls))
+        }
+    finally:
+        db.close()
+    due = [url for url in feed_urls if states.get(url) is None or states[url] <= now]
+    return sorted(due, key=lambda url: states.get(url) or datetime.min)
+
+async def poll_due_feeds():
+    """
+    Start an ingest job for the feeds that are due, skipping feeds already being
+    ingested and keeping at most `SCHEDULER_MAX_CONCURRENT_FEEDS` feeds in flight.
+    """
+    in_flight = {url for job in job_manager.active_jobs() for url in job.feed_urls}
+    capacity = settings.SCHEDULER_MAX_CONCURRENT_FEEDS - len(in_flight)
+    if capacity <= 0:
+        return
+    due = [url for url in due_feeds(settings.RSS_FEEDS) if url not in in_flight][:capacity]
+    if due:
+        job, _ = job_manager.submit(due)
+        logger.info(f"Scheduled ingest job {job.id} for {len(due)} due feeds")
+
+def compact_theme_layout(threshold: float = None, dry_run: bool = False) -> dict:
+    """Merge similar themes with the ingest pipeline held off, then mirror the merges in the theme index."""
+    with feed_service.pipeline_lock:
+        report = compact_themes(threshold=threshold, dry_run=dry_run)
+        if not dry_run:
+            feed_service.theme_service.apply_merges(report["merges"])
+    return report
 
-# Add the job to the scheduler
 scheduler.add_job(
-    process_feeds_job,
-    trigger=IntervalTrigger(minutes=settings.SCHEDULE_INTERVAL_MINUTES),
-    id='process_feeds',
-    name='Process RSS feeds',
+    poll_due_feeds,
+    trigger=IntervalTrigger(seconds=settings.SCHEDULER_TICK_SECONDS),
+    id='poll_feeds',
+    name='Poll due RSS feeds',
+    max_instances=1,
+    coalesce=True,
     replace_existing=True
-) 
\ No newline at end of file
+)
+
+# Drop old article content once a day when a retention period is configured
+if settings.CONTENT_RETENTION_DAYS > 0:
+    scheduler.add_job(
+        prune_post_content,
+        trigger=IntervalTrigger(days=1),
+        id='prune_content',
+        name='Prune old article content',
+        replace_existing=True
+    )
+
+# Merge similar themes outside the ingest path
+if settings.THEME_COMPACTION_MINUTES > 0:
+    scheduler.add_job(
+        compact_theme_layout,
+        trigger=IntervalTrigger(minutes=settings.THEME_COMPACTION_MINUTES),
+        id='compact_themes',
+        name='Merge similar themes',
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
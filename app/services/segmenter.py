@@ -0,0 +1,85 @@
+from typing import List
+from collections import Counter
+import math
+import re
+
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "gen", "gov", "sen", "rep", "rev", "capt", "col", "lt", "sgt",
+    "inc", "ltd", "co", "corp", "llc", "plc", "dept", "univ", "assn", "bros",
+    "vs", "etc", "e.g", "i.e", "cf", "al", "approx", "est", "fig", "no", "nos", "vol", "pp", "ed",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    "u.s", "u.k", "u.n", "e.u", "a.m", "p.m",
+}
+
+# A candidate boundary: terminal punctuation, optional closing quotes/brackets, whitespace,
+# then something that can start a sentence. Decimals ("3.5") have no whitespace and never match.
+BOUNDARY_PATTERN = re.compile(r'([.!?])["\'”’)\]]*\s+(?=["\'“‘(\[]?[A-Z0-9])')
+LAST_WORD_PATTERN = re.compile(r'(\S+)$')
+WORD_PATTERN = re.compile(r'[a-z][a-z\'-]{3,}')
+
+
+def _ends_with_abbreviation(fragment: str) -> bool:
+    match = LAST_WORD_PATTERN.search(fragment)
+    if not match:
+        return False
+    word = match.group(1).lower().rstrip('.').lstrip('("\'')
+    # Abbreviations and single-letter initials such as "J. Smith"
+    return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences on terminal punctuation followed by a capitalized
+    or numeric start, without breaking on abbreviations, initials or decimals.
+    """
+    sentences = []
+    start = 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        if match.group(1) == '.' and _ends_with_abbreviation(text[start:match.start() + 1]):
+            continue
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def select_within_budget(sentences: List[str], max_sentences: int, max_tokens: int, lead: int = 3) -> List[str]:
+    """
+    Cheaply pre-select the sentences worth encoding for a long article.
+
+    The first `lead` sentences are always kept (news ledes usually carry the
+    thesis); the rest are ranked by lexical centrality, the article-wide
+    frequency of their words normalized by sentence length. Sentences are
+    added by rank until `max_sentences` or `max_tokens` (whitespace tokens)
+    would be exceeded, and returned in their original order.
+    """
+    token_counts = [len(sentence.split()) for sentence in sentences]
+    if len(sentences) <= max_sentences and sum(token_counts) <= max_tokens:
+        return sentences
+
+    sentence_words = [WORD_PATTERN.findall(sentence.lower()) for sentence in sentences]
+    frequencies = Counter(word for words in sentence_words for word in set(words))
+
+    def centrality(i: int) -> float:
+        words = set(sentence_words[i])
+        if not words:
+            return 0.0
+        return sum(frequencies[word] for word in words) / math.sqrt(len(words))
+
+    order = list(range(min(lead, len(sentences))))
+    order += sorted(range(len(order), len(sentences)), key=centrality, reverse=True)
+
+    selected, tokens = [], 0
+    for i in order:
+        if len(selected) >= max_sentences:
+            break
+        if tokens + token_counts[i] > max_tokens:
+            continue
+        selected.append(i)
+        tokens += token_counts[i]
+    return [sentences[i] for i in sorted(selected)]
@@ -0,0 +1,118 @@
+from datetime import datetime
+from typing import Optional
+import threading
+import time
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import ReadSessionLocal
+from app.models import Post, Theme
+from app.services.data_version import get_theme_layout_version
+from app.services.leader import ingest_lease
+from app.services.theme_index import ThemeIndex
+
+
+class SemanticSearch:
+    """
+    Semantic search over stored theses and themes.
+
+    The query is encoded once with the shared model and ranked against the
+    post rows of the theme index (`ThemeIndex.search_posts`), so search reuses
+    the vectors already held for theme matching, through its own candidate
+    searcher (`SEARCH_INDEX_MODE`). In centroid match mode, which keeps no
+    post rows, a separate post-level index is loaded for search.
+
+    Workers that do not ingest, and the separate index, never see new posts
+    through `register_post`; they pick up newly stored posts and theme
+    rewrites at most every `SEARCH_REFRESH_SECONDS`.
+    """
+
+    def __init__(self, theme_service):
+        self.theme_service = theme_service
+        self._own_index: Optional[ThemeIndex] = None
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._layout_version: Optional[int] = None
+
+    @property
+    def index(self):
+        if hasattr(self.theme_service.index, "search_posts"):
+            return self.theme_service.index
+        if self._own_index is None:
+            self._own_index = ThemeIndex()
+        return self._own_index
+
+    def _needs_refresh(self) -> bool:
+        if self.index is self._own_index:
+            return True
+        return settings.LEADER_ELECTION and not ingest_lease.held
+
+    def refresh(self) -> None:
+        """Load the index, and catch up with posts stored by other workers when due."""
+        index = self.index
+        index.ensure_loaded()
+        if not self._needs_refresh() or time.monotonic() - self._refreshed_at < settings.SEARCH_REFRESH_SECONDS:
+            return
+        with self._refresh_lock:
+            if time.monotonic() - self._refreshed_at < settings.SEARCH_REFRESH_SECONDS:
+                return
+            layout_version = get_theme_layout_version()
+            if self._layout_version is not None and layout_version != self._layout_version:
+                # Themes were merged or re-clustered elsewhere; reload the row themes
+                index.invalidate()
+                index.ensure_loaded()
+            self._layout_version = layout_version
+            added = index.append_stored()
+            if added:
+                logger.info(f"Search index picked up {added} new posts")
+            self._refreshed_at = time.monotonic()
+
+    def search(self, query: str, k: int, published_after: Optional[datetime] = None,
+               published_before: Optional[datetime] = None) -> dict:
+        """
+        Return the `k` posts and themes most similar to `query`, optionally
+        restricted to posts published in [`published_after`, `published_before`).
+        """
+        started = time.perf_counter()
+        embedding = self.theme_service.nlp_service.encode([query])[0]
+        self.refresh()
+        post_hits, theme_hits = self.index.search_posts(
+            embedding, k, published_after=published_after, published_before=published_before
+        )
+
+        db = ReadSessionLocal()
+        try:
+            theme_ids = {theme_id for _, theme_id, _ in post_hits} | {theme_id for theme_id, _ in theme_hits}
+            titles = dict(db.query(Theme.id, Theme.title).filter(Theme.id.in_(theme_ids))) if theme_ids else {}
+            posts = {
+                post.id: post
+                for post in db.query(
+                    Post.id, Post.post_url, Post.post_title, Post.thesis_text, Post.theme_id, Post.published_at
+                ).filter(Post.id.in_([post_id for post_id, _, _ in post_hits]))
+            } if post_hits else {}
+        finally:
+            db.close()
+
+        result = {
+            "query": query,
+            "posts": [
+                {
+                    "id": post.id,
+                    "url": post.post_url,
+                    "title": post.post_title,
+                    "thesis": post.thesis_text,
+                    "theme_id": post.theme_id,
+                    "published_at": post.published_at.isoformat(),
+                    "score": round(score, 4)
+                }
+                for post_id, _, score in post_hits
+                if (post := posts.get(post_id)) is not None
+            ],
+            "themes": [
+                {"id": theme_id, "title": titles[theme_id], "score": round(score, 4)}
+                for theme_id, score in theme_hits
+                if theme_id in titles
+            ],
+            "took_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+        logger.info(f"Search for '{query}' returned {len(result['posts'])} posts and {len(result['themes'])} themes in {result['took_ms']} ms")
+        return result
@@ -0,0 +1,141 @@
+from typing import Dict, List, Optional, Tuple
+import time
+import numpy as np
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models import Post, Theme
+from app.services.data_version import bump_data_version, bump_theme_layout_version
+from app.services.embeddings import centroid_sum_from_bytes, centroid_sum_to_bytes, normalize_embeddings
+
+_SCORE_BLOCK = 1 << 24  # Similarity scores computed at once (64 MiB of float32)
+_WRITE_CHUNK = 500  # Theme ids per IN clause, below SQLite's bound parameter limit
+
+
+def load_theme_centroids(db: Session) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Ids, post counts, running sums and normalized centroids of the themes with a stored sum."""
+    rows = (
+        db.query(Theme.id, Theme.embedding_sum, Theme.embedding_count)
+        .filter(Theme.embedding_count > 0, Theme.embedding_sum.isnot(None))
+        .order_by(Theme.id)
+        .all()
+    )
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros((0, 0)), np.zeros((0, 0), dtype=np.float32)
+    theme_ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+    counts = np.fromiter((row.embedding_count for row in rows), dtype=np.int64, count=len(rows))
+    sums = np.vstack([centroid_sum_from_bytes(row.embedding_sum) for row in rows])
+    return theme_ids, counts, sums, normalize_embeddings(sums)
+
+
+def find_merge_pairs(centroids: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Row pairs (i < j) of centroids at least `threshold` similar, best first, scored in bounded blocks."""
+    rows = max(1, _SCORE_BLOCK // max(1, len(centroids)))
+    left, right, scores = [], [], []
+    for start in range(0, len(centroids), rows):
+        block = centroids[start:start + rows] @ centroids.T
+        i, j = np.nonzero(block >= threshold)
+        upper = start + i < j
+        left.append(start + i[upper])
+        right.append(j[upper])
+        scores.append(block[i[upper], j[upper]])
+    if not left:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    left, right, scores = np.concatenate(left), np.concatenate(right), np.concatenate(scores)
+    order = np.argsort(-scores, kind="stable")
+    return left[order], right[order], scores[order]
+
+
+def plan_merges(left: np.ndarray, right: np.ndarray, counts: np.ndarray) -> Dict[int, int]:
+    """
+    Pick the merges for one compaction pass from pairs sorted best first.
+    The theme with more posts absorbs the other (the older one on ties). A
+    target may absorb several themes, but only ones it is similar to itself:
+    a theme that was merged away, or that already absorbed others, is not
+    moved again in the same pass. Returns source row -> target row.
+    """
+    merges: Dict[int, int] = {}
+    targets = set()
+    for i, j in zip(left.tolist(), right.tolist()):
+        if i in merges or j in merges:
+            continue
+        target, source = (i, j) if counts[i] >= counts[j] else (j, i)
+        if source in targets:
+            continue
+        merges[source] = target
+        targets.add(target)
+    return merges
+
+
+def compact_themes(threshold: Optional[float] = None, dry_run: bool = False) -> dict:
+    """
+    Merge themes whose stored centroids are at least `threshold`
+    (`THEME_MERGE_THRESHOLD`) similar, in one transaction.
+
+    Each merge is set-based: one UPDATE moves all posts of the absorbed themes,
+    the running sums are added up and the emptied themes are deleted, so the
+    cost does not depend on how many posts a theme has. Themes that remain
+    similar after a merge are picked up by the next pass.
+
+    Returns a report with the (source, target) theme id pairs merged and the
+    time taken; with `dry_run` nothing is written.
+    """
+    if threshold is None:
+        threshold = settings.THEME_MERGE_THRESHOLD
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        theme_ids, counts, sums, centroids = load_theme_centroids(db)
+        left, right, _ = find_merge_pairs(centroids, threshold)
+        planned = plan_merges(left, right, counts)
+        merges: List[Tuple[int, int]] = [(int(theme_ids[source]), int(theme_ids[target])) for source, target in planned.items()]
+
+        if merges and not dry_run:
+            sources_by_target: Dict[int, List[int]] = {}
+            for source, target in planned.items():
+                sources_by_target.setdefault(target, []).append(source)
+
+            for target, sources in sources_by_target.items():
+                source_ids = [int(theme_ids[source]) for source in sources]
+                for start in range(0, len(source_ids), _WRITE_CHUNK):
+                    db.execute(
+                        update(Post)
+                        .where(Post.theme_id.in_(source_ids[start:start + _WRITE_CHUNK]))
+                        .values(theme_id=int(theme_ids[target]))
+                    )
+            db.execute(update(Theme), [
+                {
+                    "id": int(theme_ids[target]),
+                    "embedding_sum": centroid_sum_to_bytes(sums[target] + sums[sources].sum(axis=0)),
+                    "embedding_count": int(counts[target] + counts[sources].sum())
+                }
+                for target, sources in sources_by_target.items()
+            ])
+            source_ids = [source_id for source_id, _ in merges]
+            for start in range(0, len(source_ids), _WRITE_CHUNK):
+                db.execute(delete(Theme).where(Theme.id.in_(source_ids[start:start + _WRITE_CHUNK])))
+            bump_data_version(db)
+            bump_theme_layout_version(db)
+            db.commit()
+
+        report = {
+            "themes": int(len(theme_ids)),
+            "similar_pairs": int(len(left)),
+            "themes_merged": len(merges),
+            "merges": merges,
+            "dry_run": dry_run,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        logger.info(
+            f"Theme compaction {'dry run ' if dry_run else ''}merged {len(merges)} of {len(theme_ids)} themes "
+            f"({len(left)} pairs at or above {threshold}) in {report['seconds']}s"
+        )
+        return report
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,765 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+import threading
+import numpy as np
+from app.db.session import SessionLocal
+from app.models import Post, PostEmbedding, Theme
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.embeddings import (
+    CENTROID_SUM_DTYPE, EMBEDDING_DTYPE, centroid_sum_from_bytes, embedding_from_bytes, normalize_embeddings
+)
+from app.services.ann_index import create_searcher
+from app.services.embedding_matrix import SharedEmbeddingMatrix
+from app.services.quantization import SCALE_DTYPE, quantize, scan_dot, storage_dtype
+
+
+_EPOCH = datetime(1970, 1, 1)
+# search_posts scores every post in a time range when the range holds at most this
+# many times the rows of the probed candidate lists
+FILTERED_SCAN_FACTOR = 4
+
+
+def to_timestamp(value: Optional[datetime]) -> float:
+    """Seconds since the epoch for a naive UTC (or aware) datetime; NaN for None."""
+    if value is None:
+        return np.nan
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH).total_seconds()
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the `k` highest scores, best first, without sorting everything."""
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class ThemeIndex:
+    """
+    In-memory similarity index over stored thesis embeddings.
+
+    Rows of an L2-normalized matrix hold post embeddings; parallel arrays map
+    each row to its post and theme. A thesis is scored against every row with
+    one matrix-vector product followed by a per-theme max reduction; the
+    same scan also ranks individual posts for semantic search. A
+    pluggable searcher (see `ann_index`) can restrict scoring to a subset of
+    candidate rows for approximate search on large corpora; semantic search
+    uses its own searcher (`SEARCH_INDEX_MODE`) over the same rows unless
+    both modes match.
+
+    Rows are held at `precision` (`EMBEDDING_PRECISION`): float16 halves the
+    matrix and int8 quarters it, with a float32 scale kept per row (see
+    `quantization`).
+    """
+
+    def __init__(self, initial_capacity: int = 1024, searcher=None, precision: Optional[str] = None, post_searcher=None):
+        self._lock = threading.RLock()
+        self._initial_capacity = initial_capacity
+        if searcher is None:
+            searcher = create_searcher()
+            if post_searcher is None and settings.SEARCH_INDEX_MODE.lower() != searcher.name:
+                post_searcher = create_searcher(settings.SEARCH_INDEX_MODE)
+        self.searcher = searcher
+        self.post_searcher = post_searcher if post_searcher is not None else searcher
+        self.precision = precision or settings.EMBEDDING_PRECISION
+        self._dtype = storage_dtype(self.precision)
+        self._reset(dim=0)
+        self._loaded = False
+
+    def _reset(self, dim: int) -> None:
+        self._dim = dim
+        self._size = 0
+        self._vectors = np.zeros((self._initial_capacity, dim), dtype=self._dtype)
+        self._scales = np.ones(self._initial_capacity, dtype=SCALE_DTYPE)
+        self._theme_ids = np.zeros(self._initial_capacity, dtype=np.int64)
+        self._post_ids = np.zeros(self._initial_capacity, dtype=np.int64)
+        self._published = np.full(self._initial_capacity, np.nan)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stored rows (vectors and scales)."""
+        return self._size * (self._dim * self._vectors.itemsize + self._scales.itemsize)
+
+    def _grow(self, required: int) -> None:
+        """Grow the backing arrays geometrically so appends stay amortized O(1)."""
+        capacity = self._vectors.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2)
+        vectors = np.zeros((new_capacity, self._dim), dtype=self._dtype)
+        vectors[:self._size] = self._vectors[:self._size]
+        scales = np.ones(new_capacity, dtype=SCALE_DTYPE)
+        scales[:self._size] = self._scales[:self._size]
+        theme_ids = np.zeros(new_capacity, dtype=np.int64)
+        theme_ids[:self._size] = self._theme_ids[:self._size]
+        post_ids = np.zeros(new_capacity, dtype=np.int64)
+        post_ids[:self._size] = self._post_ids[:self._size]
+        published = np.full(new_capacity, np.nan)
+        published[:self._size] = self._published[:self._size]
+        self._vectors, self._scales, self._theme_ids, self._post_ids = vectors, scales, theme_ids, post_ids
+        self._published = published
+
+    def load(self, batch_size: int = 10000) -> None:
+        """
+        (Re)build the index from the stored embeddings of all themed posts.
+        Rows are converted to the index precision `batch_size` at a time, so no
+        full float32 copy of the corpus is materialized.
+        """
+        db = SessionLocal()
+        try:
+            query = (
+                db.query(Post.id, Post.theme_id, Post.published_at, PostEmbedding.vector, PostEmbedding.precision)
+                .join(PostEmbedding, PostEmbedding.post_id == Post.id)
+                .filter(Post.theme_id.isnot(None))
+                .filter(PostEmbedding.model_name == settings.MODEL_NAME)
+                .order_by(Post.id)
+                .yield_per(batch_size)
+            )
+            with self._lock:
+                self._reset(dim=0)
+                self._append_rows(query, batch_size)
+                self._finish_build()
+        finally:
+            db.close()
+
+    def _append_rows(self, rows, batch_size: int) -> int:
+        """Append (id, theme_id, published_at, vector, precision) rows `batch_size` at a time."""
+        total = 0
+        post_ids, theme_ids, published, vectors = [], [], [], []
+        for row in rows:
+            post_ids.append(row.id)
+            theme_ids.append(row.theme_id)
+            published.append(to_timestamp(row.published_at))
+            vectors.append(embedding_from_bytes(row.vector, precision=row.precision))
+            if len(vectors) == batch_size:
+                self._append_normalized(post_ids, theme_ids, vectors, published)
+                total += len(vectors)
+                post_ids, theme_ids, published, vectors = [], [], [], []
+        if vectors:
+            self._append_normalized(post_ids, theme_ids, vectors, published)
+            total += len(vectors)
+        return total
+
+    def append_stored(self, batch_size: int = 10000) -> int:
+        """
+        Append themed posts stored after the newest post in the index, for
+        workers that read the index but do not ingest. Returns the rows added.
+        """
+        with self._lock:
+            last_id = int(self._post_ids[:self._size].max()) if self._size else 0
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(Post.id, Post.theme_id, Post.published_at, PostEmbedding.vector, PostEmbedding.precision)
+                    .join(PostEmbedding, PostEmbedding.post_id == Post.id)
+                    .filter(Post.id > last_id, Post.theme_id.isnot(None))
+                    .filter(PostEmbedding.model_name == settings.MODEL_NAME)
+                    .order_by(Post.id)
+                    .all()
+                )
+                added = self._append_rows(rows, batch_size)
+            finally:
+                db.close()
+            self._index_rows(range(self._size - added, self._size))
+            return added
+
+    @property
+    def searchers(self) -> list:
+        """The theme matching searcher, and the semantic search one if it is separate."""
+        if self.post_searcher is self.searcher:
+            return [self.searcher]
+        return [self.searcher, self.post_searcher]
+
+    def _index_rows(self, rows: range) -> None:
+        """Make appended rows visible to the searchers."""
+        for searcher in self.searchers:
+            if searcher.needs_rebuild(self._size):
+                searcher.rebuild(self._vectors[:self._size])
+            else:
+                for row in rows:
+                    searcher.add(row, self._vectors[row])
+
+    def _rebuild_searchers(self) -> None:
+        for searcher in self.searchers:
+            searcher.rebuild(self._vectors[:self._size])
+
+    def build(self, post_ids, theme_ids, embeddings: np.ndarray, published=None, batch_size: int = 65536) -> None:
+        """
+        Replace the index contents with the given rows and rebuild the searchers.
+        Rows are normalized and converted `batch_size` at a time.
+        """
+        with self._lock:
+            self._reset(dim=0)
+            for start in range(0, len(embeddings), batch_size):
+                stop = start + batch_size
+                self._append_normalized(
+                    post_ids[start:stop], theme_ids[start:stop], embeddings[start:stop],
+                    None if published is None else published[start:stop]
+                )
+                if start == 0:
+                    self._grow(len(embeddings))
+            self._finish_build()
+
+    def _append_normalized(self, post_ids, theme_ids, embeddings, published=None) -> None:
+        embeddings = normalize_embeddings(np.vstack(embeddings) if isinstance(embeddings, list) else embeddings)
+        if self._dim == 0:
+            self._reset(embeddings.shape[1])
+        self._append(np.asarray(post_ids), np.asarray(theme_ids), embeddings, published)
+
+    def _finish_build(self) -> None:
+        self._rebuild_searchers()
+        self._loaded = True
+        logger.info(
+            f"Loaded theme index with {self._size} post embeddings "
+            f"({self.searcher.name} matching, {self.post_searcher.name} search, {self.precision}, {self.nbytes / 2**20:.1f} MiB)"
+        )
+
+    def invalidate(self) -> None:
+        """Mark the index stale so the next `ensure_loaded` rebuilds it."""
+        with self._lock:
+            self._loaded = False
+
+    def ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    def _append(self, post_ids: np.ndarray, theme_ids: np.ndarray, embeddings: np.ndarray, published=None) -> range:
+        start = self._size
+        self._grow(start + len(embeddings))
+        codes, scales = quantize(embeddings, self.precision)
+        self._vectors[start:start + len(embeddings)] = codes
+        self._scales[start:start + len(embeddings)] = scales
+        self._theme_ids[start:start + len(embeddings)] = theme_ids
+        self._post_ids[start:start + len(embeddings)] = post_ids
+        self._published[start:start + len(embeddings)] = np.nan if published is None else published
+        self._size += len(embeddings)
+        return range(start, self._size)
+
+    def add(self, post_id: int, theme_id: int, embedding: np.ndarray, published_at: Optional[datetime] = None) -> int:
+        """Append a post's embedding under the given theme and return its row."""
+        return self.add_many([post_id], [theme_id], np.asarray(embedding)[np.newaxis, :], [published_at])[0]
+
+    def add_many(self, post_ids, theme_ids, embeddings: np.ndarray, published_at=None) -> range:
+        """Append several post embeddings at once and return their rows."""
+        embeddings = normalize_embeddings(embeddings)
+        published = None if published_at is None else [to_timestamp(value) for value in published_at]
+        with self._lock:
+            if self._dim == 0:
+                self._reset(embeddings.shape[1])
+            rows = self._append(np.asarray(post_ids), np.asarray(theme_ids), embeddings, published)
+            self._index_rows(rows)
+            return rows
+
+    def bind_post_ids(self, rows, post_ids) -> None:
+        """Set the post ids of rows added before their posts were inserted."""
+        with self._lock:
+            self._post_ids[list(rows)] = post_ids
+
+    def discard(self, rows) -> None:
+        """
+        Drop rows added for a batch that was rolled back. Rows are appended in
+        order, so the index is truncated to the first of them.
+        """
+        rows = list(rows)
+        with self._lock:
+            if rows and min(rows) < self._size:
+                self._size = min(rows)
+                for searcher in self.searchers:
+                    searcher.truncate(self._size)
+
+    def merge_themes(self, source_theme_id: int, target_theme_id: int) -> None:
+        """Reassign every row of `source_theme_id` to `target_theme_id`."""
+        with self._lock:
+            theme_ids = self._theme_ids[:self._size]
+            theme_ids[theme_ids == source_theme_id] = target_theme_id
+
+    def search(self, embedding: np.ndarray, threshold: float, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Return (theme_id, score) pairs for themes whose best-matching post scores
+        at least `threshold`, sorted by descending score.
+        """
+        embedding = normalize_embeddings(embedding)
+        with self._lock:
+            if self._size == 0:
+                return []
+            rows = self.searcher.candidate_rows(embedding)
+            if rows is None:
+                scores = scan_dot(self._vectors[:self._size], self._scales[:self._size], embedding)
+                theme_ids = self._theme_ids[:self._size]
+            else:
+                scores = scan_dot(self._vectors[rows], self._scales[rows], embedding)
+                theme_ids = self._theme_ids[rows]
+            # Rows without a theme (e.g. from a rolled-back batch) never match
+            mask = (scores >= threshold) & (theme_ids >= 0)
+            scores, theme_ids = scores[mask], theme_ids[mask]
+
+        return self._best_per_theme(scores, theme_ids, limit)
+
+    @staticmethod
+    def _best_per_theme(scores: np.ndarray, theme_ids: np.ndarray, limit: Optional[int]) -> List[Tuple[int, float]]:
+        if not len(scores):
+            return []
+        # Per-theme max: after sorting by descending score, the first row of each theme is its best
+        order = np.argsort(-scores, kind="stable")
+        unique_themes, first = np.unique(theme_ids[order], return_index=True)
+        best_scores = scores[order][first]
+        ranking = np.argsort(-best_scores, kind="stable")
+        if limit is not None:
+            ranking = ranking[:limit]
+        return [(int(unique_themes[i]), float(best_scores[i])) for i in ranking]
+
+    def search_posts(self, embedding: np.ndarray, k: int, published_after: Optional[datetime] = None,
+                     published_before: Optional[datetime] = None) -> Tuple[List[Tuple[int, int, float]], List[Tuple[int, float]]]:
+        """
+        Rank posts and themes by cosine similarity to `embedding` in one scan.
+        Only posts published in [`published_after`, `published_before`) count
+        when the bounds are given. Returns the top `k` (post_id, theme_id, score)
+        rows and the top `k` (theme_id, score) pairs, scored by each theme's
+        best matching post.
+
+        With an approximate `post_searcher`, the probed candidate lists are
+        widened until at least `k` posts pass the filters (or every list is
+        probed), so a narrow time range still fills the result.
+        """
+        embedding = normalize_embeddings(embedding)
+        with self._lock:
+            if self._size == 0:
+                return [], []
+            in_range = in_range_rows = None
+            if published_after is not None or published_before is not None:
+                published = self._published[:self._size]
+                in_range = np.ones(self._size, dtype=bool)
+                if published_after is not None:
+                    in_range &= published >= to_timestamp(published_after)
+                if published_before is not None:
+                    in_range &= published < to_timestamp(published_before)
+                in_range_rows = np.flatnonzero(in_range)
+            n_probe = None
+            while True:
+                rows = self.post_searcher.candidate_rows(embedding, n_probe)
+                # Scan every post in the time range when that is about as cheap as the probed lists: it is exact
+                exhaustive = rows is None or (in_range is not None and len(in_range_rows) <= FILTERED_SCAN_FACTOR * len(rows))
+                if exhaustive:
+                    rows = slice(0, self._size) if in_range is None else in_range_rows
+                scores = scan_dot(self._vectors[rows], self._scales[rows], embedding)
+                post_ids, theme_ids = self._post_ids[rows], self._theme_ids[rows]
+                mask = (theme_ids >= 0) & (post_ids > 0)
+                if in_range is not None and not exhaustive:
+                    mask &= in_range[rows]
+                keep = np.flatnonzero(mask)
+                if exhaustive or len(keep) >= k:
+                    break
+                n_probe = self.post_searcher.widen(n_probe)
+                if n_probe is None:
+                    break
+            scores, post_ids, theme_ids = scores[keep], np.asarray(post_ids)[keep], theme_ids[keep]
+
+        best = top_k(scores, k)
+        posts = [(int(post_ids[i]), int(theme_ids[i]), float(scores[i])) for i in best]
+        # A theme's score is its best post: widen the top rows until they cover k themes
+        # (every theme left out then scores below all of them), rather than reducing every row
+        depth = max(k * 16, 256)
+        while True:
+            head = top_k(scores, depth)
+            themes = self._best_per_theme(scores[head], theme_ids[head], k)
+            if len(themes) >= k or depth >= len(scores):
+                return posts, themes
+            depth *= 4
+
+
+class SharedThemeIndex(ThemeIndex):
+    """
+    `ThemeIndex` whose vectors live in a `SharedEmbeddingMatrix`.
+
+    The vectors, scales and post ids are read-only memory maps shared with
+    every other worker on the host; only the row -> theme and publish time
+    arrays are private. Rows appended by other processes are picked up before
+    each search, with their themes looked up in the database.
+
+    Posts registered before they are inserted are staged privately (they
+    still take part in theme matching) and only appended to the shared matrix
+    by `bind_post_ids`, once their batch has committed, so other workers
+    never adopt rows whose posts do not exist yet.
+    """
+
+    def __init__(self, matrix: SharedEmbeddingMatrix, searcher=None):
+        self.matrix = matrix
+        self._staged = {}
+        self._next_handle = 0
+        super().__init__(searcher=searcher, precision=matrix.precision)
+
+    def _map(self) -> None:
+        self.matrix.refresh()
+        self._dim = self.matrix.dim
+        self._vectors, self._scales, self._post_ids = self.matrix.vectors, self.matrix.scales, self.matrix.post_ids
+
+    def _reset(self, dim: int) -> None:
+        self._size = 0
+        self._staged = {}
+        self._theme_ids = np.zeros(self._initial_capacity, dtype=np.int64)
+        self._published = np.full(self._initial_capacity, np.nan)
+        self._map()
+        if self._vectors is None:
+            self._dim = dim
+            self._vectors = np.zeros((0, dim), dtype=self._dtype)
+
+    def _grow(self, required: int) -> None:
+        capacity = self._theme_ids.shape[0]
+        if required > capacity:
+            new_capacity = max(required, capacity * 2)
+            theme_ids = np.zeros(new_capacity, dtype=np.int64)
+            theme_ids[:self._size] = self._theme_ids[:self._size]
+            published = np.full(new_capacity, np.nan)
+            published[:self._size] = self._published[:self._size]
+            self._theme_ids, self._published = theme_ids, published
+
+    @staticmethod
+    def _lookup_posts(post_ids: np.ndarray, batch_size: int = 500) -> Tuple[np.ndarray, np.ndarray]:
+        """Current theme (-1 for unknown or unthemed posts) and publish time of each post id."""
+        theme_ids = np.full(len(post_ids), -1, dtype=np.int64)
+        published = np.full(len(post_ids), np.nan)
+        known = np.flatnonzero(post_ids > 0)
+        db = SessionLocal()
+        try:
+            if len(known) > 50 * batch_size:
+                # Large ranges: stream every themed post once and join by sorted id
+                rows = (
+                    db.query(Post.id, Post.theme_id, Post.published_at)
+                    .filter(Post.theme_id.isnot(None))
+                    .order_by(Post.id)
+                    .all()
+                )
+                ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+                themes = np.fromiter((row.theme_id for row in rows), dtype=np.int64, count=len(rows))
+                times = np.fromiter((to_timestamp(row.published_at) for row in rows), dtype=np.float64, count=len(rows))
+                positions = np.minimum(np.searchsorted(ids, post_ids[known]), max(len(ids) - 1, 0))
+                found = ids[positions] == post_ids[known] if len(ids) else np.zeros(len(known), dtype=bool)
+                theme_ids[known[found]] = themes[positions[found]]
+                published[known[found]] = times[positions[found]]
+            else:
+                for start in range(0, len(known), batch_size):
+                    chunk = known[start:start + batch_size]
+                    mapping = {
+                        row.id: row
+                        for row in db.query(Post.id, Post.theme_id, Post.published_at)
+                        .filter(Post.id.in_(post_ids[chunk].tolist()), Post.theme_id.isnot(None))
+                    }
+                    for position, post_id in zip(chunk, post_ids[chunk].tolist()):
+                        row = mapping.get(post_id)
+                        if row is not None:
+                            theme_ids[position] = row.theme_id
+                            published[position] = to_timestamp(row.published_at)
+        finally:
+            db.close()
+        return theme_ids, published
+
+    def _catch_up(self, end: Optional[int] = None) -> None:
+        """Adopt rows other processes published after ours, up to `end` (default: all)."""
+        self._map()
+        end = self.matrix.length if end is None else end
+        if end <= self._size:
+            return
+        start = self._size
+        self._grow(end)
+        self._theme_ids[start:end], self._published[start:end] = self._lookup_posts(np.asarray(self._post_ids[start:end]))
+        self._size = end
+        self._index_rows(range(start, end))
+
+    def load(self, batch_size: int = 10000) -> None:
+        """Append stored embeddings missing from the shared matrix, then map it and look up each row's theme."""
+        def missing_rows(after_id: int):
+            db = SessionLocal()
+            try:
+                while True:
+                    rows = (
+                        db.query(PostEmbedding.post_id, PostEmbedding.vector, PostEmbedding.precision)
+                        .filter(PostEmbedding.post_id > after_id, PostEmbedding.model_name == settings.MODEL_NAME)
+                        .order_by(PostEmbedding.post_id)
+                        .limit(batch_size)
+                        .all()
+                    )
+                    if not rows:
+                        return
+                    after_id = rows[-1].post_id
+                    yield (
+                        [row.post_id for row in rows],
+                        normalize_embeddings(np.vstack([embedding_from_bytes(row.vector, precision=row.precision) for row in rows]))
+                    )
+            finally:
+                db.close()
+
+        with self._lock:
+            appended = self.matrix.extend(missing_rows)
+            if appended:
+                logger.info(f"Appended {appended} stored embeddings to {self.matrix.path}")
+            self._reset(dim=0)
+            self._catch_up()
+            self._rebuild_searchers()
+            self._loaded = True
+        logger.info(
+            f"Mapped shared theme index with {self._size} post embeddings "
+            f"({self.searcher.name} matching, {self.post_searcher.name} search, {self.precision}, {self.nbytes / 2**20:.1f} MiB shared)"
+        )
+
+    def build(self, post_ids, theme_ids, embeddings: np.ndarray, published=None) -> None:
+        """Replace the shared matrix with the given rows (stop the other workers first)."""
+        with self._lock:
+            self.matrix.remove()
+            super().build(post_ids, theme_ids, embeddings, published)
+
+    def _append(self, post_ids: np.ndarray, theme_ids: np.ndarray, embeddings: np.ndarray, published=None) -> range:
+        rows = self.matrix.append(post_ids, embeddings)
+        # Rows other processes appended before ours keep their database themes
+        self._catch_up(rows.start)
+        self._map()
+        self._grow(rows.stop)
+        self._theme_ids[rows.start:rows.stop] = theme_ids
+        self._published[rows.start:rows.stop] = np.nan if published is None else published
+        self._size = rows.stop
+        return rows
+
+    def append_stored(self, batch_size: int = 10000) -> int:
+        """Rows published by other workers are adopted on every search; nothing to do."""
+        return 0
+
+    def add_many(self, post_ids, theme_ids, embeddings: np.ndarray, published_at=None) -> range:
+        """
+        Append rows of inserted posts to the shared matrix. Rows of posts not
+        inserted yet (post id -1) are staged until `bind_post_ids`; the
+        returned handles then identify the staged rows instead of matrix rows.
+        """
+        if np.all(np.asarray(post_ids) > 0):
+            return super().add_many(post_ids, theme_ids, embeddings, published_at)
+        embeddings = normalize_embeddings(embeddings)
+        published = [np.nan] * len(embeddings) if published_at is None else [to_timestamp(value) for value in published_at]
+        with self._lock:
+            handles = range(self._next_handle, self._next_handle + len(embeddings))
+            self._next_handle = handles.stop
+            for handle, theme_id, embedding, timestamp in zip(handles, theme_ids, embeddings, published):
+                self._staged[handle] = [embedding, int(theme_id), timestamp]
+            return handles
+
+    def discard(self, handles) -> None:
+        """Drop staged rows of a batch that was rolled back; nothing reached the shared matrix."""
+        with self._lock:
+            for handle in handles:
+                self._staged.pop(handle, None)
+
+    def bind_post_ids(self, handles, post_ids) -> None:
+        """Publish staged rows to the shared matrix under the ids their posts were inserted with."""
+        with self._lock:
+            staged = [self._staged.pop(handle) for handle in handles]
+            if not staged:
+                return
+            rows = self._append(
+                np.asarray(post_ids), np.array([row[1] for row in staged], dtype=np.int64),
+                np.vstack([row[0] for row in staged]), [row[2] for row in staged]
+            )
+            self._index_rows(rows)
+
+    def merge_themes(self, source_theme_id: int, target_theme_id: int) -> None:
+        with self._lock:
+            super().merge_themes(source_theme_id, target_theme_id)
+            for row in self._staged.values():
+                if row[1] == source_theme_id:
+                    row[1] = target_theme_id
+
+    def search(self, embedding: np.ndarray, threshold: float, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        with self._lock:
+            self._catch_up()
+            if not self._staged:
+                return super().search(embedding, threshold, limit=limit)
+            matches = dict(super().search(embedding, threshold))
+            staged = list(self._staged.values())
+            scores = np.vstack([row[0] for row in staged]) @ normalize_embeddings(embedding)
+            theme_ids = np.array([row[1] for row in staged], dtype=np.int64)
+        mask = scores >= threshold
+        # A theme's score is its best row, whether published or staged
+        for theme_id, score in self._best_per_theme(scores[mask], theme_ids[mask], None):
+            if score > matches.get(theme_id, -np.inf):
+                matches[theme_id] = score
+        ranking = sorted(matches.items(), key=lambda match: -match[1])
+        return ranking if limit is None else ranking[:limit]
+
+    def search_posts(self, embedding: np.ndarray, k: int, published_after: Optional[datetime] = None,
+                     published_before: Optional[datetime] = None):
+        with self._lock:
+            self._catch_up()
+        return super().search_posts(embedding, k, published_after=published_after, published_before=published_before)
+
+
+class CentroidIndex:
+    """
+    In-memory index with one row per theme holding its normalized centroid.
+
+    Each theme keeps a running sum of its posts' embeddings and a count, so
+    adding a post or merging two themes is O(1) and scoring a thesis costs
+    one dot product per theme.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.RLock()
+        self._initial_capacity = initial_capacity
+        self._reset(dim=0)
+        self._loaded = False
+
+    def _reset(self, dim: int) -> None:
+        self._dim = dim
+        self._size = 0
+        self._sums = np.zeros((self._initial_capacity, dim), dtype=CENTROID_SUM_DTYPE)
+        self._centroids = np.zeros((self._initial_capacity, dim), dtype=EMBEDDING_DTYPE)
+        self._counts = np.zeros(self._initial_capacity, dtype=np.int64)
+        self._theme_ids = np.zeros(self._initial_capacity, dtype=np.int64)
+        self._rows = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _grow(self, required: int) -> None:
+        capacity = self._sums.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2)
+        for name in ("_sums", "_centroids", "_counts", "_theme_ids"):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def load(self) -> None:
+        """(Re)build the index from the running sums stored on the themes table."""
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(Theme.id, Theme.embedding_sum, Theme.embedding_count)
+                .filter(Theme.embedding_count > 0)
+                .filter(Theme.embedding_sum.isnot(None))
+                .all()
+            )
+        finally:
+            db.close()
+
+        with self._lock:
+            self._reset(0)
+            for row in rows:
+                self._add_sum(row.id, centroid_sum_from_bytes(row.embedding_sum), row.embedding_count)
+            self._loaded = True
+        logger.info(f"Loaded centroid index with {self._size} themes")
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    def _add_sum(self, theme_id: int, embedding_sum: np.ndarray, count: int) -> None:
+        if self._dim == 0:
+            self._reset(embedding_sum.shape[0])
+        row = self._rows.get(theme_id)
+        if row is None:
+            self._grow(self._size + 1)
+            row = self._size
+            self._rows[theme_id] = row
+            self._theme_ids[row] = theme_id
+            self._size += 1
+        self._sums[row] += embedding_sum
+        self._counts[row] += count
+        self._centroids[row] = normalize_embeddings(self._sums[row])
+
+    def add(self, post_id: int, theme_id: int, embedding: np.ndarray, published_at: Optional[datetime] = None) -> Tuple[int, np.ndarray]:
+        """Fold a post's embedding into its theme's running sum; the returned handle undoes it in `discard`."""
+        embedding_sum = normalize_embeddings(embedding).astype(CENTROID_SUM_DTYPE)
+        with self._lock:
+            self._add_sum(theme_id, embedding_sum, 1)
+        return theme_id, embedding_sum
+
+    def add_many(self, post_ids, theme_ids, embeddings: np.ndarray, published_at=None) -> None:
+        for post_id, theme_id, embedding in zip(post_ids, theme_ids, embeddings):
+            self.add(post_id, theme_id, embedding)
+
+    def bind_post_ids(self, handles, post_ids) -> None:
+        """Rows are per theme, so there are no post ids to bind."""
+
+    def discard(self, handles) -> None:
+        """Subtract the posts of a rolled-back batch from their themes' sums."""
+        with self._lock:
+            for theme_id, embedding_sum in handles:
+                if theme_id not in self._rows:
+                    continue
+                self._add_sum(theme_id, -embedding_sum, -1)
+                if self._counts[self._rows[theme_id]] <= 0:
+                    self._drop_row(theme_id)
+
+    def _drop_row(self, theme_id: int) -> None:
+        row = self._rows.pop(theme_id)
+        # Fill the hole with the last row so the arrays stay dense
+        last = self._size - 1
+        if row != last:
+            for array in (self._sums, self._centroids, self._counts, self._theme_ids):
+                array[row] = array[last]
+            self._rows[int(self._theme_ids[row])] = row
+        self._sums[last] = 0
+        self._counts[last] = 0
+        self._size -= 1
+
+    def merge_themes(self, source_theme_id: int, target_theme_id: int) -> None:
+        """Add the source theme's sum to the target and drop the source row."""
+        with self._lock:
+            source_row = self._rows.get(source_theme_id)
+            if source_row is None:
+                return
+            self._add_sum(target_theme_id, self._sums[source_row].copy(), int(self._counts[source_row]))
+            self._drop_row(source_theme_id)
+
+    def search(self, embedding: np.ndarray, threshold: float, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return (theme_id, score) pairs for centroids scoring at least `threshold`, best first."""
+        embedding = normalize_embeddings(embedding)
+        with self._lock:
+            if self._size == 0:
+                return []
+            scores = self._centroids[:self._size] @ embedding
+            theme_ids = self._theme_ids[:self._size].copy()
+
+        matches = np.flatnonzero(scores >= threshold)
+        ranking = matches[np.argsort(-scores[matches], kind="stable")]
+        if limit is not None:
+            ranking = ranking[:limit]
+        return [(int(theme_ids[i]), float(scores[i])) for i in ranking]
+
+
+def create_theme_index(mode: Optional[str] = None):
+    """Build the theme index selected by `THEME_MATCH_MODE`."""
+    mode = (mode or settings.THEME_MATCH_MODE).lower()
+    if mode == "max":
+        if settings.SHARED_EMBEDDING_MATRIX:
+            return SharedThemeIndex(SharedEmbeddingMatrix(settings.EMBEDDING_MATRIX_PATH))
+        return ThemeIndex()
+    if mode == "centroid":
+        return CentroidIndex()
+    raise ValueError(f"Unknown theme match mode: {mode}")
+
+
+theme_index = create_theme_index()
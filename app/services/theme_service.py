@@ -1,15 +1,24 @@
 from typing import Optional, List, Tuple
-from app.db.session import SessionLocal
+import numpy as np
+from sqlalchemy import and_, func, or_
+from app.db.session import SessionLocal, ReadSessionLocal
 from app.models import Theme, Post
 from app.services.nlp_service import NLPService
+from app.services.embeddings import (
+    backfill_post_embeddings, rebuild_theme_centroids, centroid_sum_from_bytes, centroid_sum_to_bytes, CENTROID_SUM_DTYPE
+)
+from app.services.theme_index import theme_index
+from app.services.data_version import bump_data_version, get_theme_layout_version
 from app.core.config import settings
 from app.core.logging import logger
 import re
 from datetime import datetime, timedelta
 
 class ThemeService:
-    def __init__(self):
-        self.nlp_service = NLPService()
+    def __init__(self, nlp_service: Optional[NLPService] = None, index=None):
+        self.nlp_service = nlp_service or NLPService()
+        self.index = index if index is not None else theme_index
+        self._layout_version: Optional[int] = None
 
     def clean_title(self, thesis: str) -> str:
         """Create a clean, meaningful title from the thesis."""
@@ -30,90 +39,145 @@ class ThemeService:
         
         return title.strip()
 
-    def get_theme_candidates(self, thesis: str, db: SessionLocal) -> List[Tuple[Theme, float]]:
+    def ensure_index(self) -> None:
+        """Embed any posts still missing a stored vector and theme centroid, then load the theme index."""
+        if self.index.loaded:
+            return
+        backfill_post_embeddings(self.nlp_service)
+        rebuild_theme_centroids(only_missing=True)
+        self.index.ensure_loaded()
+
+    def sync_index(self) -> None:
+        """Drop the in-memory index if another process rewrote the themes (e.g. re-clustering)."""
+        version = get_theme_layout_version()
+        if self._layout_version is not None and version != self._layout_version:
+            logger.info("Theme layout changed since the index was loaded; reloading it")
+            self.index.invalidate()
+        self._layout_version = version
+
+    def apply_merges(self, merges: List[Tuple[int, int]]) -> None:
+        """
+        Mirror (source, target) theme merges committed by this process in the
+        in-memory index, instead of reloading it on the next `sync_index`.
+        """
+        for source_id, target_id in merges:
+            self.index.merge_themes(source_id, target_id)
+        self._layout_version = get_theme_layout_version()
+
+    def accumulate_theme_embedding(self, db: SessionLocal, theme_id: int, embedding: np.ndarray) -> None:
+        """Add a post's embedding to its theme's persisted running sum (caller commits)."""
+        theme = db.get(Theme, theme_id)
+        embedding_sum = centroid_sum_from_bytes(theme.embedding_sum)
+        if embedding_sum is None:
+            embedding_sum = np.zeros(embedding.shape[0], dtype=CENTROID_SUM_DTYPE)
+        theme.embedding_sum = centroid_sum_to_bytes(embedding_sum + embedding)
+        theme.embedding_count = (theme.embedding_count or 0) + 1
+
+    def register_post(self, post_id: Optional[int], theme_id: int, embedding: np.ndarray,
+                      published_at: Optional[datetime] = None):
+        """
+        Make a post visible to theme matching and search. When the post is not inserted yet, pass
+        `post_id=None` and bind the id later with `bind_post_ids` using the returned handle.
+        """
+        return self.index.add(-1 if post_id is None else post_id, theme_id, embedding, published_at)
+
+    def bind_post_ids(self, handles: list, post_ids: List[int]) -> None:
+        """Attach database ids to posts registered before they were inserted."""
+        self.index.bind_post_ids(handles, post_ids)
+
+    def discard_posts(self, handles: list) -> None:
+        """Take posts registered for a rolled-back batch back out of the index."""
+        self.index.discard(handles)
+
+    def get_theme_candidates(self, thesis: str, db: SessionLocal, embedding: Optional[np.ndarray] = None) -> List[Tuple[Theme, float]]:
         """Get potential theme matches with their similarity scores."""
+        if embedding is None:
+            embedding = self.nlp_service.encode([thesis])[0]
+
+        self.ensure_index()
+        scores = self.index.search(embedding, settings.SIMILARITY_THRESHOLD, limit=settings.THEME_CANDIDATES_TOP_K)
+        if not scores:
+            return []
+
+        themes = {theme.id: theme for theme in db.query(Theme).filter(Theme.id.in_([theme_id for theme_id, _ in scores]))}
         candidates = []
-        existing_themes = db.query(Theme).all()
-        
-        for theme in existing_themes:
-            # Get all posts for this theme
-            posts = db.query(Post).filter(Post.theme_id == theme.id).all()
-            if not posts:
+        for theme_id, similarity in scores:
+            theme = themes.get(theme_id)
+            if theme is None:
                 continue
-                
-            # Calculate similarity with each post's thesis
-            max_similarity = 0.0
-            for post in posts:
-                similarity = self.nlp_service.calculate_similarity(thesis, post.thesis_text)
-                max_similarity = max(max_similarity, similarity)
-            
-            # Only consider themes with significant similarity
-            if max_similarity >= settings.SIMILARITY_THRESHOLD:
-                candidates.append((theme, max_similarity))
-                logger.info(f"Found candidate theme '{theme.title}' with similarity score: {max_similarity:.2f}")
+            candidates.append((theme, similarity))
+            logger.info(f"Found candidate theme '{theme.title}' with similarity score: {similarity:.2f}")
         
-        # Sort by similarity score
-        return sorted(candidates, key=lambda x: x[1], reverse=True)
+        # Already sorted by similarity score
+        return candidates
 
-    def find_or_create_theme(self, thesis: str) -> Theme:
-        """Find an existing theme or create a new one based on thesis similarity."""
+    def find_or_create_theme(self, thesis: str, embedding: Optional[np.ndarray] = None) -> Theme:
+        """
+        Find an existing theme or create a new one based on thesis similarity.
+        Pass the thesis `embedding` when it is already known to avoid re-encoding it.
+        """
         db = SessionLocal()
         try:
-            # Get potential theme matches
-            candidates = self.get_theme_candidates(thesis, db)
-            
-            if candidates:
-                # Get the best matching theme
-                best_theme, similarity = candidates[0]
-                logger.info(f"Selected best matching theme '{best_theme.title}' with similarity score: {similarity:.2f}")
-                
-                # If we have multiple good candidates, consider merging them
-                if len(candidates) > 1 and candidates[1][1] >= settings.SIMILARITY_THRESHOLD:
-                    # Get the second best match
-                    second_theme, second_similarity = candidates[1]
-                    
-                    # If the second theme is very similar to the first, merge them
-                    if second_similarity >= settings.SIMILARITY_THRESHOLD + 0.1:  # Slightly higher threshold for merging
-                        logger.info(f"Merging themes '{second_theme.title}' into '{best_theme.title}' due to high similarity: {second_similarity:.2f}")
-                        # Move all posts from second theme to first theme
-                        posts_to_move = db.query(Post).filter(Post.theme_id == second_theme.id).all()
-                        for post in posts_to_move:
-                            post.theme_id = best_theme.id
-                        
-                        # Update the first theme's title if it's older
-                        if best_theme.created_at > second_theme.created_at:
-                            best_theme.title = self.clean_title(thesis)
-                            logger.info(f"Updated theme title to: {best_theme.title}")
-                        
-                        # Delete the second theme
-                        db.delete(second_theme)
-                        db.commit()
-                        logger.info(f"Deleted merged theme (ID: {second_theme.id})")
-                
-                return best_theme
-
-            # Create new theme if no similar theme found
-            clean_title = self.clean_title(thesis)
-            new_theme = Theme(title=clean_title)
-            db.add(new_theme)
+            theme = self.assign_theme(db, thesis, embedding=embedding)
+            bump_data_version(db)
             db.commit()
-            db.refresh(new_theme)
-            logger.info(f"Created new theme: '{clean_title}' (ID: {new_theme.id})")
-            return new_theme
-
+            db.refresh(theme)
+            return theme
+        except Exception:
+            db.rollback()
+            raise
         finally:
             db.close()
 
-    def get_theme_timeline(self, theme_id: int) -> Optional[dict]:
-        """Get a timeline view of all posts for a theme."""
-        db = SessionLocal()
+    def assign_theme(self, db: SessionLocal, thesis: str, embedding: Optional[np.ndarray] = None) -> Theme:
+        """
+        Find or create the theme for a thesis inside the caller's transaction.
+        Changes are flushed but not committed. Similar themes are not merged here;
+        that is left to the periodic compaction task (see `theme_compaction`).
+        """
+        # Get potential theme matches
+        candidates = self.get_theme_candidates(thesis, db, embedding=embedding)
+        
+        if candidates:
+            # Get the best matching theme
+            best_theme, similarity = candidates[0]
+            logger.info(f"Selected best matching theme '{best_theme.title}' with similarity score: {similarity:.2f}")
+            return best_theme
+
+        # Create new theme if no similar theme found
+        clean_title = self.clean_title(thesis)
+        new_theme = Theme(title=clean_title)
+        db.add(new_theme)
+        db.flush()
+        logger.info(f"Created new theme: '{clean_title}' (ID: {new_theme.id})")
+        return new_theme
+
+    def get_theme_timeline(self, theme_id: int, limit: Optional[int] = None, after_id: Optional[int] = None) -> Optional[dict]:
+        """
+        Get a timeline view of a theme's posts, oldest first, one page at a time.
+        `after_id` is the last post ID of the previous page; `next_after_id` in the
+        result is None on the last page.
+        """
+        limit = limit or settings.API_PAGE_SIZE
+        db = ReadSessionLocal()
         try:
-            theme = db.query(Theme).filter(Theme.id == theme_id).first()
+            theme = db.query(Theme.id, Theme.title).filter(Theme.id == theme_id).first()
             if not theme:
                 logger.warning(f"Theme not found with ID: {theme_id}")
                 return None
 
-            posts = db.query(Post).filter(Post.theme_id == theme_id).order_by(Post.published_at).all()
+            query = db.query(
+                Post.id, Post.post_url, Post.post_title, Post.thesis_text, Post.published_at
+            ).filter(Post.theme_id == theme_id)
+            if after_id is not None:
+                cursor = db.query(Post.published_at).filter(Post.id == after_id, Post.theme_id == theme_id).first()
+                if cursor is None:
+                    return {"theme_id": theme.id, "title": theme.title, "posts": [], "next_after_id": None}
+                query = query.filter(or_(
+                    Post.published_at > cursor.published_at,
+                    and_(Post.published_at == cursor.published_at, Post.id > after_id)
+                ))
+            posts = query.order_by(Post.published_at, Post.id).limit(limit).all()
             logger.info(f"Retrieved {len(posts)} posts for theme '{theme.title}' (ID: {theme_id})")
             
             return {
@@ -128,25 +192,57 @@ class ThemeService:
                         "published_at": post.published_at.isoformat()
                     }
                     for post in posts
-                ]
+                ],
+                "next_after_id": posts[-1].id if len(posts) == limit else None
             }
         finally:
             db.close()
 
-    def get_all_themes(self) -> list:
-        """Get all themes with post counts."""
-        db = SessionLocal()
+    def get_all_themes(self, limit: Optional[int] = None, after_id: Optional[int] = None, sort: str = "count") -> list:
+        """
+        Get one page of themes with post counts, using a single grouped query.
+        `sort` is "count" (most posts first) or "recent" (latest post first); ties are
+        broken by theme ID. `after_id` is the last theme ID of the previous page.
+        """
+        if sort not in ("count", "recent"):
+            raise ValueError(f"Unknown theme sort order: {sort}")
+        limit = limit or settings.API_PAGE_SIZE
+        db = ReadSessionLocal()
         try:
-            themes = db.query(Theme).all()
+            stats = (
+                db.query(
+                    Post.theme_id.label("theme_id"),
+                    func.count(Post.id).label("post_count"),
+                    func.max(Post.published_at).label("latest_post_at")
+                )
+                .group_by(Post.theme_id)
+                .subquery()
+            )
+            post_count = func.coalesce(stats.c.post_count, 0)
+            latest_post_at = func.coalesce(stats.c.latest_post_at, Theme.created_at)
+            sort_key = post_count if sort == "count" else latest_post_at
+            query = db.query(
+                Theme.id, Theme.title, post_count.label("post_count"), latest_post_at.label("latest_post_at")
+            ).outerjoin(stats, stats.c.theme_id == Theme.id)
+
+            if after_id is not None:
+                cursor = query.filter(Theme.id == after_id).first()
+                if cursor is None:
+                    return []
+                cursor_key = cursor.post_count if sort == "count" else cursor.latest_post_at
+                query = query.filter(or_(sort_key < cursor_key, and_(sort_key == cursor_key, Theme.id < after_id)))
+
+            themes = query.order_by(sort_key.desc(), Theme.id.desc()).limit(limit).all()
             theme_data = [
                 {
                     "id": theme.id,
                     "title": theme.title,
-                    "post_count": len(theme.posts)
+                    "post_count": theme.post_count,
+                    "latest_post_at": theme.latest_post_at.isoformat() if theme.latest_post_at else None
                 }
                 for theme in themes
             ]
             logger.info(f"Retrieved {len(theme_data)} themes with post counts")
             return theme_data
         finally:
-            db.close() 
\ No newline at end of file
+            db.close()
@@ -0,0 +1,3 @@
+"""
+Performance benchmarks
+"""
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Memory, scan latency and accuracy of reduced-precision theme index storage.
+
+Builds the same synthetic corpus at float32, float16 and int8, runs the same
+queries through an exact scan of each, and compares the best theme returned
+above SIMILARITY_THRESHOLD (or no theme, which creates a new one) and the
+best score with the float32 results.
+
+Usage:
+    python -m benchmarks.embedding_precision --posts 200000 --themes 2000 --queries 500
+"""
+import argparse
+import numpy as np
+from app.core.config import settings
+from app.services.ann_index import ExactSearcher
+from app.services.quantization import PRECISIONS
+from app.services.theme_index import ThemeIndex
+from benchmarks.theme_index_ann import make_corpus, make_queries, run_queries
+
+
+def best_theme(result) -> int:
+    return result[0][0] if result else -1
+
+
+def best_score(result) -> float:
+    return result[0][1] if result else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200000)
+    parser.add_argument("--themes", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--off-topic", type=float, default=0.2, help="Share of queries matching no theme")
+    parser.add_argument("--threshold", type=float, default=settings.SIMILARITY_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    centers, theme_ids, vectors = make_corpus(args.posts, args.themes, args.dim, args.noise, args.seed)
+    queries = make_queries(centers, args.queries, args.noise, args.off_topic, args.seed)
+    print(f"Corpus: {args.posts} posts, {args.themes} themes, {args.dim} dims, {args.queries} queries")
+
+    baseline = None
+    for precision in PRECISIONS:
+        index = ThemeIndex(searcher=ExactSearcher(), precision=precision)
+        index.build(np.arange(len(vectors)), theme_ids, vectors)
+        run_queries(index, queries[:10], args.threshold, 1)  # Warm up
+        results, latencies = run_queries(index, queries, args.threshold, 1)
+        if baseline is None:
+            baseline = results
+        agreement = np.mean([best_theme(a) == best_theme(b) for a, b in zip(results, baseline)])
+        score_error = np.mean([abs(best_score(a) - best_score(b)) for a, b in zip(results, baseline)])
+        print(
+            f"  {precision:>7}: {index.nbytes / 2**20:8.1f} MiB  "
+            f"p50 {np.percentile(latencies, 50):7.2f} ms  p95 {np.percentile(latencies, 95):7.2f} ms  "
+            f"agreement {agreement:.4f}  mean score error {score_error:.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Latency of semantic search (`ThemeIndex.search_posts`) on a synthetic corpus.
+
+Builds a corpus of clustered unit vectors with random publish times, then
+times top-k post and theme retrieval for the same queries without a time
+filter and restricted to a recent window, against the p95 latency target.
+With --encode the query text is also encoded with the configured model, as
+the endpoint does.
+
+Usage:
+    python -m benchmarks.semantic_search --posts 1000000 --themes 5000 --queries 300
+    python -m benchmarks.semantic_search --posts 1000000 --index exact --precision int8
+"""
+import argparse
+from datetime import datetime, timedelta
+import time
+import numpy as np
+from app.core.config import settings
+from app.services.ann_index import ExactSearcher, IVFSearcher
+from app.services.quantization import PRECISIONS
+from app.services.theme_index import ThemeIndex, to_timestamp
+from benchmarks.theme_index_ann import make_corpus, make_queries
+
+
+def time_queries(index: ThemeIndex, queries: np.ndarray, k: int, published_after=None) -> np.ndarray:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search_posts(query, k, published_after=published_after)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def report(name: str, latencies: np.ndarray, target_ms: float) -> bool:
+    p95 = np.percentile(latencies, 95)
+    passed = p95 < target_ms
+    print(
+        f"  {name:<22} p50 {np.percentile(latencies, 50):7.2f} ms  p95 {p95:7.2f} ms  "
+        f"p99 {np.percentile(latencies, 99):7.2f} ms  {'PASS' if passed else 'FAIL'}"
+    )
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--themes", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=settings.SEARCH_DEFAULT_K)
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--days", type=int, default=365, help="Publish times are spread over this many days")
+    parser.add_argument("--window-days", type=int, default=7, help="Time filter: posts from the last N days")
+    parser.add_argument("--index", choices=["exact", "ivf"], default=settings.SEARCH_INDEX_MODE)
+    parser.add_argument("--precision", choices=PRECISIONS, default=settings.EMBEDDING_PRECISION)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    parser.add_argument("--encode", action="store_true", help="Also time encoding the query with the configured model")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    centers, theme_ids, vectors = make_corpus(args.posts, args.themes, args.dim, args.noise, args.seed)
+    queries = make_queries(centers, args.queries, args.noise, 0.0, args.seed)
+    now = datetime.utcnow()
+    rng = np.random.default_rng(args.seed + 2)
+    published = to_timestamp(now) - rng.uniform(0, args.days * 86400, args.posts)
+
+    searcher = ExactSearcher() if args.index == "exact" else IVFSearcher(
+        n_lists=settings.IVF_N_LISTS, n_probe=settings.IVF_N_PROBE, min_train_size=1
+    )
+    index = ThemeIndex(searcher=searcher, precision=args.precision)
+    start = time.perf_counter()
+    index.build(np.arange(1, args.posts + 1), theme_ids, vectors, published)
+    del vectors
+    print(
+        f"Corpus: {args.posts} posts, {args.themes} themes, {args.dim} dims; "
+        f"{args.index} {args.precision} index of {index.nbytes / 2**20:.0f} MiB built in {time.perf_counter() - start:.1f}s"
+    )
+
+    time_queries(index, queries[:10], args.k)  # Warm up
+    print(f"top-{args.k} posts and themes, {args.queries} queries, target p95 < {args.target_ms:.0f} ms")
+    results = [
+        report("all posts", time_queries(index, queries, args.k), args.target_ms),
+        report(f"last {args.window_days} days", time_queries(
+            index, queries, args.k, published_after=now - timedelta(days=args.window_days)
+        ), args.target_ms)
+    ]
+
+    if args.encode:
+        from app.services.nlp_service import NLPService
+
+        nlp_service = NLPService()
+        texts = [f"Latest developments in topic {i} and what they mean for the industry" for i in range(args.queries)]
+        nlp_service.encode(texts[:5])  # Load the model
+        latencies = []
+        for text in texts:
+            start = time.perf_counter()
+            index.search_posts(nlp_service.encode([text])[0], args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append(report("encode + all posts", np.array(latencies), args.target_ms))
+
+    print("PASS" if all(results) else "FAIL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Concurrent readers vs. one ingest writer on SQLite, per engine profile.
+
+Creates a scratch database, then runs reader threads issuing the theme
+listing query while a writer thread inserts posts in batched transactions.
+Reports read latency, write throughput and "database is locked" errors for
+each profile.
+
+Usage:
+    python -m benchmarks.sqlite_concurrency --readers 8 --seconds 10
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from sqlalchemy import func, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.db.session import create_db_engine
+from app.models import Base, Post, Theme
+
+
+def seed(engine, themes: int, posts: int) -> None:
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    now = datetime.utcnow()
+    db.execute(insert(Theme), [{"title": f"Theme {i}", "created_at": now} for i in range(themes)])
+    db.execute(insert(Post), [
+        {
+            "theme_id": i % themes + 1,
+            "thesis_text": f"Seed thesis {i}",
+            "post_title": f"Seed post {i}",
+            "post_url": f"https://example.com/seed/{i}",
+            "content": "x" * 2000,
+            "published_at": now,
+            "ingested_at": now
+        }
+        for i in range(posts)
+    ])
+    db.commit()
+    db.close()
+
+
+def run_profile(profile: str, path: str, readers: int, seconds: float, batch_size: int, themes: int, posts: int) -> dict:
+    uri = f"sqlite:///{path}"
+    write_engine = create_db_engine(uri, profile=profile)
+    read_engine = create_db_engine(uri, profile=profile, read_only=True) if profile == "production" else write_engine
+    seed(write_engine, themes, posts)
+
+    WriteSession = sessionmaker(bind=write_engine)
+    ReadSession = sessionmaker(bind=read_engine)
+    stop = threading.Event()
+    latencies, errors, written = [], {"read": 0, "write": 0}, [0]
+    lock = threading.Lock()
+
+    def reader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            db = ReadSession()
+            try:
+                db.query(Theme.id, Theme.title, func.count(Post.id)).outerjoin(Post).group_by(Theme.id).all()
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                with lock:
+                    errors["read"] += 1
+            finally:
+                db.close()
+
+    def writer():
+        batch = 0
+        while not stop.is_set():
+            db = WriteSession()
+            now = datetime.utcnow()
+            try:
+                db.execute(insert(Post), [
+                    {
+                        "theme_id": (batch * batch_size + i) % themes + 1,
+                        "thesis_text": "New thesis",
+                        "post_title": "New post",
+                        "post_url": f"https://example.com/{profile}/{batch}/{i}",
+                        "content": "y" * 2000,
+                        "published_at": now,
+                        "ingested_at": now
+                    }
+                    for i in range(batch_size)
+                ])
+                db.commit()
+                written[0] += batch_size
+            except OperationalError:
+                db.rollback()
+                errors["write"] += 1
+            finally:
+                db.close()
+            batch += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "reads": len(latencies),
+        "read_p50_ms": np.percentile(latencies, 50),
+        "read_p95_ms": np.percentile(latencies, 95),
+        "writes_per_s": written[0] / seconds,
+        "read_errors": errors["read"],
+        "write_errors": errors["write"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--themes", type=int, default=500)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--profiles", nargs="+", default=["default", "production"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in args.profiles:
+            result = run_profile(profile, os.path.join(directory, f"{profile}.db"), args.readers,
+                                 args.seconds, args.batch_size, args.themes, args.posts)
+            print(
+                f"{profile:>10}: {result['reads']:6d} reads  p50 {result['read_p50_ms']:7.2f} ms  "
+                f"p95 {result['read_p95_ms']:7.2f} ms  {result['writes_per_s']:8.0f} posts/s written  "
+                f"locked errors: read {result['read_errors']}, write {result['write_errors']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Recall/latency benchmark for theme candidate retrieval: exact scan vs IVF.
+
+Builds a synthetic corpus of clustered unit vectors (one cluster per theme),
+then runs the same queries through both searchers and compares the themes
+returned above SIMILARITY_THRESHOLD.
+
+Usage:
+    python -m benchmarks.theme_index_ann --posts 200000 --themes 2000 --queries 500
+"""
+import argparse
+import time
+import numpy as np
+from app.core.config import settings
+from app.services.ann_index import ExactSearcher, IVFSearcher
+from app.services.theme_index import ThemeIndex
+
+
+def make_corpus(n_posts: int, n_themes: int, dim: int, noise: float, seed: int, chunk_size: int = 65536):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_themes, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    theme_ids = rng.integers(0, n_themes, n_posts)
+    # Filled in float32 chunks, so large corpora never need a float64 copy
+    vectors = np.empty((n_posts, dim), dtype=np.float32)
+    for start in range(0, n_posts, chunk_size):
+        chunk = theme_ids[start:start + chunk_size]
+        noise_chunk = rng.standard_normal(size=(len(chunk), dim), dtype=np.float32)
+        vectors[start:start + len(chunk)] = centers[chunk] + noise * noise_chunk / np.sqrt(dim)
+    return centers, theme_ids, vectors
+
+
+def make_queries(centers: np.ndarray, n_queries: int, noise: float, off_topic: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    dim = centers.shape[1]
+    queries = centers[rng.integers(0, len(centers), n_queries)]
+    queries = queries + noise * rng.normal(size=queries.shape).astype(np.float32) / np.sqrt(dim)
+    # A share of queries belongs to no existing theme and should create a new one
+    n_off = int(n_queries * off_topic)
+    queries[:n_off] = rng.normal(size=(n_off, dim))
+    return queries
+
+
+def build_index(searcher, theme_ids: np.ndarray, vectors: np.ndarray) -> ThemeIndex:
+    index = ThemeIndex(searcher=searcher)
+    start = time.perf_counter()
+    index.build(np.arange(len(vectors)), theme_ids, vectors)
+    print(f"  {searcher.name:>5}: build {time.perf_counter() - start:.2f}s")
+    return index
+
+
+def run_queries(index: ThemeIndex, queries: np.ndarray, threshold: float, k: int):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(index.search(query, threshold, limit=k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200000)
+    parser.add_argument("--themes", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--off-topic", type=float, default=0.2, help="Share of queries matching no theme")
+    parser.add_argument("--k", type=int, default=settings.THEME_CANDIDATES_TOP_K)
+    parser.add_argument("--threshold", type=float, default=settings.SIMILARITY_THRESHOLD)
+    parser.add_argument("--n-lists", type=int, default=settings.IVF_N_LISTS)
+    parser.add_argument("--n-probe", type=int, default=settings.IVF_N_PROBE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Corpus: {args.posts} posts, {args.themes} themes, dim {args.dim}")
+    centers, theme_ids, vectors = make_corpus(args.posts, args.themes, args.dim, args.noise, args.seed)
+    queries = make_queries(centers, args.queries, args.noise, args.off_topic, args.seed)
+
+    exact = build_index(ExactSearcher(), theme_ids, vectors)
+    ivf = build_index(IVFSearcher(n_lists=args.n_lists, n_probe=args.n_probe, min_train_size=1), theme_ids, vectors)
+    del vectors
+
+    exact_results, exact_ms = run_queries(exact, queries, args.threshold, args.k)
+    ivf_results, ivf_ms = run_queries(ivf, queries, args.threshold, args.k)
+
+    hits, relevant, top1_agree, decision_agree = 0, 0, 0, 0
+    for expected, actual in zip(exact_results, ivf_results):
+        expected_ids = {theme_id for theme_id, _ in expected}
+        actual_ids = {theme_id for theme_id, _ in actual}
+        hits += len(expected_ids & actual_ids)
+        relevant += len(expected_ids)
+        # Same decision for find_or_create_theme: join the same theme, or create a new one
+        top1_agree += (expected[:1] and actual[:1] and expected[0][0] == actual[0][0]) or (not expected and not actual)
+        decision_agree += bool(expected) == bool(actual)
+
+    n = len(queries)
+    print(f"\nThreshold {args.threshold}, top-{args.k}, n_probe {args.n_probe}")
+    print(f"  recall@{args.k}:          {hits / max(relevant, 1):.4f}")
+    print(f"  top-1 agreement:     {top1_agree / n:.4f}")
+    print(f"  match/new agreement: {decision_agree / n:.4f}")
+    for name, latencies in (("exact", exact_ms), ("ivf", ivf_ms)):
+        print(f"  {name:>5} latency ms: p50 {np.percentile(latencies, 50):.2f}  p95 {np.percentile(latencies, 95):.2f}")
+    print(f"  speedup (p50): {np.percentile(exact_ms, 50) / max(np.percentile(ivf_ms, 50), 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
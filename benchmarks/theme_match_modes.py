@@ -0,0 +1,68 @@
+"""
+Clustering quality and speed of the "max" and "centroid" theme match modes.
+
+Streams a synthetic corpus through the same greedy assign-or-create rule as
+ThemeService.find_or_create_theme (without merges) and reports purity,
+completeness and throughput for each mode.
+
+Usage:
+    python -m benchmarks.theme_match_modes --posts 20000 --themes 200
+"""
+import argparse
+import time
+import numpy as np
+from app.core.config import settings
+from app.services.ann_index import ExactSearcher
+from app.services.theme_index import CentroidIndex, ThemeIndex
+from benchmarks.theme_index_ann import make_corpus
+
+
+def stream(index, vectors: np.ndarray, threshold: float):
+    """Assign each vector to its best theme above `threshold` or open a new theme."""
+    assigned = np.empty(len(vectors), dtype=np.int64)
+    next_theme = 0
+    start = time.perf_counter()
+    for i, vector in enumerate(vectors):
+        matches = index.search(vector, threshold, limit=1)
+        if matches:
+            theme_id = matches[0][0]
+        else:
+            theme_id = next_theme
+            next_theme += 1
+        index.add(i, theme_id, vector)
+        assigned[i] = theme_id
+    return assigned, time.perf_counter() - start
+
+
+def purity(labels: np.ndarray, truth: np.ndarray) -> float:
+    """Share of posts whose predicted theme's majority true label matches their own."""
+    total = 0
+    for label in np.unique(labels):
+        total += np.bincount(truth[labels == label]).max()
+    return total / len(labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--themes", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--threshold", type=float, default=settings.SIMILARITY_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _, truth, vectors = make_corpus(args.posts, args.themes, args.dim, args.noise, args.seed)
+    print(f"Corpus: {args.posts} posts, {args.themes} true themes, threshold {args.threshold}")
+    for name, index in (("max", ThemeIndex(searcher=ExactSearcher())), ("centroid", CentroidIndex())):
+        assigned, elapsed = stream(index, vectors, args.threshold)
+        # Completeness is purity with the roles swapped: how unsplit each true theme is
+        print(
+            f"  {name:>8}: {len(np.unique(assigned)):6d} themes  "
+            f"purity {purity(assigned, truth):.4f}  completeness {purity(truth, assigned):.4f}  "
+            f"{args.posts / elapsed:8.0f} posts/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
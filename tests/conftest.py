@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.db.session import ReadSessionLocal, create_db_engine
+from app.models import Base
+
+
+@pytest.fixture
+def production_db(tmp_path):
+    """
+    A scratch SQLite database on the production engine profile. `ReadSessionLocal`
+    is bound to its read-only engine for the test; yields the writer's session factory.
+    """
+    uri = f"sqlite:///{tmp_path / 'rss_nlp.db'}"
+    write_engine = create_db_engine(uri, profile="production")
+    Base.metadata.create_all(write_engine)
+    read_engine = create_db_engine(uri, profile="production", read_only=True)
+    previous_bind = ReadSessionLocal.kw["bind"]
+    ReadSessionLocal.configure(bind=read_engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+    finally:
+        ReadSessionLocal.configure(bind=previous_bind)
+        read_engine.dispose()
+        write_engine.dispose()
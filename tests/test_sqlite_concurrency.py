@@ -0,0 +1,80 @@
+import threading
+from datetime import datetime
+from sqlalchemy import func, insert
+from sqlalchemy.exc import OperationalError
+from app.db.session import ReadSessionLocal
+from app.models import Post, Theme
+
+READERS = 8
+WRITE_BATCHES = 20
+BATCH_SIZE = 50
+
+
+def test_readers_run_alongside_writer_without_lock_errors(production_db):
+    db = production_db()
+    db.execute(insert(Theme), [{"title": f"Theme {i}", "created_at": datetime.utcnow()} for i in range(10)])
+    db.commit()
+    db.close()
+
+    writing = threading.Event()
+    done = threading.Event()
+    errors, reads = [], []
+    lock = threading.Lock()
+
+    def reader():
+        writing.wait()
+        while not done.is_set():
+            db = ReadSessionLocal()
+            try:
+                db.query(Theme.id, func.count(Post.id)).outerjoin(Post).group_by(Theme.id).all()
+                with lock:
+                    reads.append(1)
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+            finally:
+                db.close()
+
+    def writer():
+        writing.set()
+        try:
+            for batch in range(WRITE_BATCHES):
+                db = production_db()
+                now = datetime.utcnow()
+                try:
+                    db.execute(insert(Post), [
+                        {
+                            "theme_id": i % 10 + 1,
+                            "thesis_text": "A thesis",
+                            "post_title": "A post",
+                            "post_url": f"https://example.com/{batch}/{i}",
+                            "content": "x" * 2000,
+                            "published_at": now,
+                            "ingested_at": now
+                        }
+                        for i in range(BATCH_SIZE)
+                    ])
+                    db.commit()
+                except OperationalError as e:
+                    db.rollback()
+                    with lock:
+                        errors.append(str(e))
+                finally:
+                    db.close()
+        finally:
+            done.set()
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert not [error for error in errors if "database is locked" in error]
+    assert not errors
+    assert reads
+    db = ReadSessionLocal()
+    try:
+        assert db.query(func.count(Post.id)).scalar() == WRITE_BATCHES * BATCH_SIZE
+    finally:
+        db.close()